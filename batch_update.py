@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# batch_update.py
+"""
+Headless node-path update over many .hip files.
+
+The parent process fetches the shot's PublishedFile table from ShotGrid once,
+saves it as JSON, then starts --workers long-lived hython worker processes.
+Each worker pays the Houdini startup and licence checkout once, loads the
+shared table once, and then takes hip files from a common queue: it resolves
+against the table with no ShotGrid connection, saves the hip file and writes
+a per-file JSON report. A worker that crashes is replaced for the remaining
+files; its log is kept as worker_N.log in the report directory.
+
+Usage:
+    batch_update.py --shot SH010 [--project NAME] [--filter apr_ta]
+                    [--workers 4] [--report-dir DIR] [--table FILE]
+                    [--no-save] <hip files or globs>...
+"""
+
+import sys
+import os
+import glob
+import json
+import hashlib
+import time
+import argparse
+import queue
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+HYTHON = os.environ.get("HYTHON", "hython")
+# Printed by a worker, followed by the hip path, once that file's report is written
+DONE_PREFIX = "@@batch_update done "
+
+
+def _connect():
+    """Return a ShotGrid connection from the running engine or the saved login."""
+    import sgtk
+    import sg_client
+    engine = sgtk.platform.current_engine()
+    if engine:
+        return sg_client.wrap(engine.shotgun), engine.context.project
+    user = sgtk.authentication.ShotgunAuthenticator().get_user()
+    return sg_client.wrap(user.create_sg_connection()), None
+
+
+def prefetch_table(shot_name, project_name=None):
+    """Fetch the PublishTable for shot_name (in project_name or the context project)."""
+    from publish_table import PublishTable
+    sg, project = _connect()
+    if project_name:
+        project = sg.find_one("Project", [["name", "is", project_name]], ["name"])
+    if not project:
+        raise ValueError("No project given and no Toolkit context available")
+    shot = sg.find_one("Shot", [["project", "is", project], ["code", "is", shot_name]], ["code"])
+    if not shot:
+        raise ValueError(f"Shot '{shot_name}' not found in {project['name']}")
+    table = PublishTable.fetch(sg, project, [shot])
+    print(f">>> Prefetched {len(table.publishes)} publishes for {shot_name}")
+    return table
+
+
+def expand_hip_files(patterns):
+    """Expand globs and de-duplicate, keeping the order given."""
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        files.extend(os.path.abspath(m) for m in matches)
+    return list(dict.fromkeys(files))
+
+
+def _report_path(report_dir, hip):
+    """Per-file report path; hashed on the full path so same-named hips don't collide."""
+    digest = hashlib.sha1(os.path.abspath(hip).encode("utf-8")).hexdigest()[:10]
+    return os.path.join(report_dir, f"{os.path.basename(hip)}.{digest}.json")
+
+
+def update_hip(hip, shot_name, version_filter, report_path, save=True):
+    """Update one hip file in the running hython session and write its report."""
+    import hou
+    import core
+    import instrument
+    start = time.time()
+    report = {"hip": hip, "shot": shot_name, "version_filter": version_filter, "changes": []}
+    try:
+        hou.hipFile.load(hip, suppress_save_prompt=True, ignore_load_warnings=True)
+        changes = core.update_all_node_paths(version_filter)
+        report["changes"] = [
+            {"parm": c.parm.path(), "old": c.old, "new": c.new} for c in changes
+        ]
+        if save and changes:
+            hou.hipFile.save()
+        report["status"] = "ok"
+        report["run"] = instrument.stats().summary()
+    except Exception as e:
+        report["status"] = "error"
+        report["error"] = str(e)
+    finally:
+        # Next file starts from an empty scene
+        hou.hipFile.clear(suppress_save_prompt=True)
+    report["elapsed"] = round(time.time() - start, 3)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    return report["status"] == "ok"
+
+
+def run_worker(table_path, shot_name, version_filter, report_dir, save=True, hips=sys.stdin):
+    """
+    Worker entry (inside hython): load the publish table once, then update
+    every hip file named on hips (one path per line) until EOF, announcing
+    each written report on stdout with DONE_PREFIX.
+    """
+    import core
+    import instrument
+    from publish_table import load_manifest
+    instrument.set_quiet()
+    core.use_publish_table(load_manifest(table_path), shot_name)
+    for line in hips:
+        hip = line.strip()
+        if not hip:
+            continue
+        update_hip(hip, shot_name, version_filter, _report_path(report_dir, hip), save)
+        print(DONE_PREFIX + hip, flush=True)
+
+
+class WorkerProcess:
+    """A long-lived hython worker (see run_worker), fed hip paths on stdin."""
+    def __init__(self, args, table_path, log_path):
+        cmd = [
+            HYTHON, os.path.abspath(__file__), "--worker",
+            "--table", table_path, "--shot", args.shot,
+            "--filter", args.filter, "--report-dir", args.report_dir,
+        ]
+        if args.no_save:
+            cmd.append("--no-save")
+        self.log_path = log_path
+        self._log = open(log_path, "a")
+        self.proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=self._log, text=True, bufsize=1
+        )
+
+    def update(self, hip):
+        """Have the worker update hip. Returns False if the worker died first."""
+        try:
+            self.proc.stdin.write(hip + "\n")
+            self.proc.stdin.flush()
+        except OSError:
+            return False
+        for line in self.proc.stdout:
+            if line.rstrip("\n") == DONE_PREFIX + hip:
+                return True
+            self._log.write(line)   # Houdini's own output
+        return False
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        self.proc.wait()
+        self._log.close()
+
+    def log_tail(self, size=2000):
+        with open(self.log_path) as f:
+            return f.read()[-size:]
+
+
+def _drain(index, hips, args, table_path):
+    """Update hip files from the hips queue on one worker process. Returns {hip: report}."""
+    log_path = os.path.join(args.report_dir, f"worker_{index}.log")
+    open(log_path, "w").close()     # replacement workers append to it
+    reports = {}
+    worker = None
+    while True:
+        try:
+            hip = hips.get_nowait()
+        except queue.Empty:
+            break
+        report_path = _report_path(args.report_dir, hip)
+        # A report left by an earlier run must not pass for this one
+        if os.path.exists(report_path):
+            os.remove(report_path)
+        worker = worker or WorkerProcess(args, table_path, log_path)
+        if not worker.update(hip):
+            # Worker died on this file (e.g. hython crash); a new one takes the next
+            worker.close()
+            if not os.path.exists(report_path):
+                with open(report_path, "w") as f:
+                    json.dump({"hip": hip, "status": "error", "error": worker.log_tail()}, f, indent=2)
+            worker = None
+        with open(report_path) as f:
+            reports[hip] = json.load(f)
+    if worker:
+        worker.close()
+    return reports
+
+
+def run_batch(args):
+    hips = expand_hip_files(args.hips)
+    if not hips:
+        print("[ERROR] No hip files matched.")
+        return 1
+    os.makedirs(args.report_dir, exist_ok=True)
+    table_path = args.table
+    if not table_path:
+        table_path = os.path.join(args.report_dir, "publish_table.json")
+        prefetch_table(args.shot, args.project).save(table_path)
+
+    workers = max(1, min(args.workers, len(hips)))
+    print(f">>> Updating {len(hips)} hip file(s) with {workers} worker(s)...")
+    start = time.time()
+    hip_queue = queue.Queue()
+    for hip in hips:
+        hip_queue.put(hip)
+    found = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for reports in executor.map(lambda i: _drain(i, hip_queue, args, table_path), range(workers)):
+            found.update(reports)
+    reports = [found[hip] for hip in hips]
+    failed = [r for r in reports if r.get("status") != "ok"]
+    for r in reports:
+        print(f"-- [{r.get('status')}] {r['hip']}: {len(r.get('changes', []))} change(s)")
+    summary = {
+        "files": len(reports),
+        "failed": [r["hip"] for r in failed],
+        "changes": sum(len(r.get("changes", [])) for r in reports),
+        "elapsed": round(time.time() - start, 3),
+    }
+    with open(os.path.join(args.report_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f">>> Done in {summary['elapsed']}s, {len(failed)} failed. Reports in {args.report_dir}")
+    return 2 if failed else 0
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Update node paths across many hip files.")
+    parser.add_argument("hips", nargs="*", help="hip files or glob patterns")
+    parser.add_argument("--shot", required=True, help="shot code to swap in")
+    parser.add_argument("--project", help="project name (default: Toolkit context project)")
+    parser.add_argument("--filter", default="apr_ta", choices=["all", "apr", "ta", "apr_ta"])
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--report-dir", default=os.path.join(tempfile.gettempdir(), "batch_update"))
+    parser.add_argument("--table", help="use this pre-fetched publish table (JSON) or publish index (SQLite)")
+    parser.add_argument("--no-save", action="store_true", help="don't save the hip files")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    if args.worker:
+        run_worker(args.table, args.shot, args.filter, args.report_dir, save=not args.no_save)
+        sys.exit(0)
+    sys.exit(run_batch(args))
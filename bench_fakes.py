@@ -0,0 +1,711 @@
+"""
+In-process stand-ins for sgtk, hou and the ShotGrid connection, used by
+benchmark.py to measure the tools without a live site or a Houdini licence.
+
+install() registers fake "sgtk" and "hou" modules in sys.modules (so it must
+run before core / gui are imported) and builds a FakeSite: a synthetic
+project with publishes in a fake ShotGrid, matching files on disk under a temp
+root and a scene of N nodes pointing at them. The site counts ShotGrid round
+trips and parm sets; latency is simulated with time.sleep.
+"""
+
+import os
+import re
+import sys
+import time
+import types
+import threading
+import contextlib
+import itertools
+import datetime
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ShotGrid
+
+def _get_field(record, field):
+    """Resolve a plain or dotted (linked) field of a fake record."""
+    if field in record:
+        return record[field]
+    return None
+
+
+def _same(a, b):
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.get("type") == b.get("type") and a.get("id") == b.get("id")
+    return a == b
+
+
+def _match(record, flt):
+    """Evaluate one ShotGrid filter (list or filter group) against record."""
+    if isinstance(flt, dict):
+        results = (_match(record, f) for f in flt["filters"])
+        return any(results) if flt["filter_operator"] == "any" else all(results)
+    field, op, value = flt[0], flt[1], flt[2]
+    actual = _get_field(record, field)
+    if op == "is":
+        return _same(actual, value)
+    if op == "is_not":
+        return not _same(actual, value)
+    if op == "in":
+        return any(_same(actual, v) for v in value)
+    if op == "not_in":
+        return not any(_same(actual, v) for v in value)
+    if op == "greater_than":
+        return actual is not None and actual > value
+    if op == "less_than":
+        return actual is not None and actual < value
+    raise ValueError(f"Unsupported fake filter operator: {op}")
+
+
+class FakeShotgun:
+    """Thread-safe fake ShotGrid connection over the site's records."""
+    def __init__(self, site):
+        self.site = site
+
+    def _call(self, method):
+        self.site.count("sg_calls")
+        self.site.count(f"sg_{method}")
+        if self.site.latency:
+            time.sleep(self.site.latency)
+
+    def _select(self, entity_type, filters, fields, order=None, limit=0):
+        records = [
+            r for r in self.site.records.get(entity_type, [])
+            if all(_match(r, f) for f in filters)
+        ]
+        for o in reversed(order or []):
+            records.sort(key=lambda r: _get_field(r, o["field_name"]),
+                         reverse=o.get("direction") == "desc")
+        if limit:
+            records = records[:limit]
+        fields = list(fields or []) + ["id", "type"]
+        return [{f: _get_field(r, f) for f in fields} for r in records]
+
+    def find(self, entity_type, filters, fields=None, order=None, filter_operator=None, limit=0, **kwargs):
+        self._call("find")
+        if filter_operator == "any":
+            filters = [{"filter_operator": "any", "filters": filters}]
+        return self._select(entity_type, filters, fields, order, limit)
+
+    def find_one(self, entity_type, filters, fields=None, order=None, **kwargs):
+        self._call("find_one")
+        found = self._select(entity_type, filters, fields, order, 1)
+        return found[0] if found else None
+
+    def summarize(self, entity_type, filters, summary_fields, grouping=None, **kwargs):
+        self._call("summarize")
+        records = [
+            r for r in self.site.records.get(entity_type, [])
+            if all(_match(r, f) for f in filters)
+        ]
+
+        def _summary(rows):
+            out = {}
+            for s in summary_fields:
+                values = [_get_field(r, s["field"]) for r in rows]
+                values = [v for v in values if v is not None]
+                if s["type"] == "maximum":
+                    out[s["field"]] = max(values) if values else None
+                elif s["type"] == "minimum":
+                    out[s["field"]] = min(values) if values else None
+                elif s["type"] == "count":
+                    out[s["field"]] = len(values)
+            return out
+
+        def _groups(rows, grouping):
+            if not grouping:
+                return []
+            field = grouping[0]["field"]
+            buckets = {}
+            for r in rows:
+                value = _get_field(r, field)
+                key = (value.get("type"), value.get("id")) if isinstance(value, dict) else value
+                buckets.setdefault(key, (value, []))[1].append(r)
+            out = []
+            for value, rows_ in buckets.values():
+                group = {
+                    "group_name": value.get("name") if isinstance(value, dict) else str(value),
+                    "group_value": value,
+                    "summaries": _summary(rows_),
+                }
+                children = _groups(rows_, grouping[1:])
+                if children:
+                    group["groups"] = children
+                out.append(group)
+            return out
+
+        return {"summaries": _summary(records), "groups": _groups(records, grouping)}
+
+    def batch(self, requests):
+        self._call("batch")
+        return [
+            self._select(r["entity_type"], r["filters"], r.get("fields"))
+            for r in requests
+        ]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Toolkit
+
+class FakeKey:
+    def __init__(self, name, regex, format_spec=None, is_abstract=False):
+        self.name = name
+        self.regex = regex
+        self.format_spec = format_spec
+        self.is_abstract = is_abstract
+
+    @property
+    def default(self):
+        return f"%{self.format_spec}d" if self.is_abstract else None
+
+    def str_from_value(self, value):
+        if isinstance(value, int):
+            return format(value, self.format_spec or "")
+        return str(value)
+
+    def value_from_str(self, text):
+        if self.format_spec and text.isdigit():
+            return int(text)
+        return text
+
+
+KEYS = {
+    "Shot": FakeKey("Shot", r"[A-Za-z0-9]+"),
+    "name": FakeKey("name", r"[A-Za-z0-9_]+"),
+    "version": FakeKey("version", r"\d+", "03"),
+    "SEQ": FakeKey("SEQ", r"%0\d+d|\$F\d*|\d+", "04", is_abstract=True),
+    "step": FakeKey("step", r"[A-Za-z]+"),
+}
+
+
+class FakeTemplate:
+    def __init__(self, site, name, definition, root_path):
+        self.site = site
+        self.name = name
+        self.definition = definition
+        self.root_path = root_path
+        self.keys = {}
+        pattern = ""
+        last = 0
+        for m in re.finditer(r"{(\w+)}", definition):
+            pattern += re.escape(definition[last:m.start()])
+            key = m.group(1)
+            if key in self.keys:
+                pattern += f"(?P={key})"
+            else:
+                self.keys[key] = KEYS[key]
+                pattern += f"(?P<{key}>{KEYS[key].regex})"
+            last = m.end()
+        pattern += re.escape(definition[last:])
+        self._regex = re.compile("^" + re.escape(root_path + os.sep) + pattern + "$")
+
+    def __repr__(self):
+        return f"<FakeTemplate {self.name}>"
+
+    def validate(self, path, fields=None, skip_keys=None):
+        self.site.count("template_validates")
+        return bool(self._regex.match(path))
+
+    def get_fields(self, path, skip_keys=None):
+        m = self._regex.match(path)
+        if not m:
+            raise ValueError(f"Template {self.name} doesn't match {path}")
+        return {k: self.keys[k].value_from_str(v) for k, v in m.groupdict().items()}
+
+    def missing_keys(self, fields, skip_defaults=False):
+        return [k for k in self.keys if k not in fields]
+
+    def apply_fields(self, fields, platform=None):
+        missing = self.missing_keys(fields)
+        if missing:
+            raise ValueError(f"Missing fields for {self.name}: {missing}")
+        path = re.sub(
+            r"{(\w+)}",
+            lambda m: self.keys[m.group(1)].str_from_value(fields[m.group(1)]),
+            self.definition
+        )
+        return self.root_path + os.sep + path
+
+
+class FakePipelineConfiguration:
+    def __init__(self, site):
+        self.site = site
+
+    def get_path(self):
+        return os.path.join(self.site.root, "config")
+
+    def get_config_location(self):
+        return os.path.join(self.site.root, "config")
+
+
+class FakeTk:
+    def __init__(self, site):
+        self.site = site
+        self.roots = {"primary": site.project_root}
+        self.pipeline_configuration = FakePipelineConfiguration(site)
+        self.templates = site.templates
+        self.shotgun = FakeShotgun(site)
+
+    def templates_from_path(self, path):
+        self.site.count("templates_from_path")
+        return [t for t in self.templates.values() if t.validate(path)]
+
+    def paths_from_template(self, template, fields, skip_keys=None, skip_missing_optional_keys=False):
+        import glob
+        self.site.count("paths_from_template")
+        glob_fields = dict(fields)
+        for key in template.keys:
+            if key not in glob_fields or template.keys[key].is_abstract:
+                glob_fields[key] = "*"
+        return sorted(glob.glob(template.apply_fields(glob_fields)))
+
+    def abstract_paths_from_template(self, template, fields):
+        found = set()
+        for path in self.paths_from_template(template, fields):
+            f = template.get_fields(path)
+            for key in template.keys.values():
+                if key.is_abstract:
+                    f[key.name] = key.default
+            found.add(template.apply_fields(f))
+        return sorted(found)
+
+
+class FakeContext:
+    def __init__(self, project, entity):
+        self.project = project
+        self.entity = entity
+
+
+class FakeEngine:
+    def __init__(self, site):
+        self.site = site
+        self.sgtk = FakeTk(site)
+        self.shotgun = FakeShotgun(site)
+        self.context = FakeContext(site.project, site.shots[site.context_shot])
+        self.apps = {}
+
+
+class FakeUser:
+    def __init__(self, site):
+        self.site = site
+
+    def create_sg_connection(self):
+        self.site.count("sg_connections")
+        return FakeShotgun(self.site)
+
+
+class FakeToolkitManager:
+    """sgtk.bootstrap.ToolkitManager: starts a project-context engine."""
+    def __init__(self, sg_user=None):
+        self.plugin_id = None
+        self.base_configuration = None
+
+    def bootstrap_engine(self, engine_name, entity=None):
+        site = _state.site
+        site.count("toolkit_bootstraps")
+        site.engine = FakeEngine(site)
+        site.engine.context = FakeContext(site.project, None)
+        return site.engine
+
+
+def _make_sgtk():
+    mod = types.ModuleType("sgtk")
+    mod.platform = types.SimpleNamespace(current_engine=lambda: _state.site.engine)
+    mod.sgtk_from_path = lambda path: (_state.site.count("sgtk_from_path"), FakeTk(_state.site))[1]
+    mod.get_authenticated_user = lambda: FakeUser(_state.site)
+    mod.util = types.SimpleNamespace(shotgun=types.SimpleNamespace(
+        create_sg_connection=lambda: FakeShotgun(_state.site)))
+    mod.authentication = types.SimpleNamespace(
+        ShotgunAuthenticator=lambda: types.SimpleNamespace(get_user=lambda: FakeUser(_state.site)))
+    mod.bootstrap = types.SimpleNamespace(ToolkitManager=FakeToolkitManager)
+    mod.set_authenticated_user = lambda user: None
+    mod.TankError = Exception
+    mod.__fake__ = True
+    return mod
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Houdini
+
+class _Enum:
+    def __init__(self, *names):
+        for name in names:
+            setattr(self, name, name)
+
+
+class FakeParmTemplate:
+    def __init__(self, file_ref):
+        self._file_ref = file_ref
+
+    def type(self):
+        return "String"
+
+    def stringType(self):
+        return "FileReference" if self._file_ref else "Regular"
+
+
+class FakeParm:
+    def __init__(self, site, node, name, value, file_ref=True):
+        self.site = site
+        self._node = node
+        self._name = name
+        self._value = value
+        self._template = FakeParmTemplate(file_ref)
+
+    def name(self):
+        return self._name
+
+    def node(self):
+        return self._node
+
+    def path(self):
+        return f"{self._node.path()}/{self._name}"
+
+    def evalAsString(self):
+        self.site.count("parm_evals")
+        return self._value
+
+    def eval(self):
+        return self.evalAsString()
+
+    def unexpandedString(self):
+        return self._value
+
+    def set(self, value):
+        self.site.count("parm_sets")
+        self._value = value
+
+    def parmTemplate(self):
+        return self._template
+
+
+class FakeNodeType:
+    def __init__(self, site, name, category):
+        self.site = site
+        self._name = name
+        self._category = category
+        self._instances = []
+
+    def name(self):
+        return self._name
+
+    def category(self):
+        return self._category
+
+    def instances(self):
+        return tuple(self._instances)
+
+
+class FakeNodeTypeCategory:
+    def __init__(self, name):
+        self._name = name
+        self.node_types = {}
+
+    def name(self):
+        return self._name
+
+    def nodeTypes(self):
+        return dict(self.node_types)
+
+
+class FakeNode:
+    _ids = itertools.count(1)
+
+    def __init__(self, site, path, node_type):
+        self.site = site
+        self._path = path
+        self._type = node_type
+        self._parms = {}
+        self._children = []
+        self._user_data = {}
+        self._session_id = next(self._ids)
+        if node_type:
+            node_type._instances.append(self)
+
+    def path(self):
+        return self._path
+
+    def name(self):
+        return self._path.rsplit("/", 1)[-1]
+
+    def type(self):
+        self.site.count("node_type_calls")
+        return self._type
+
+    def parm(self, name):
+        return self._parms.get(name)
+
+    def parms(self):
+        return tuple(self._parms.values())
+
+    def sessionId(self):
+        return self._session_id
+
+    def isInsideLockedHDA(self):
+        return False
+
+    def allSubChildren(self):
+        out = []
+        for child in self._children:
+            out.append(child)
+            out.extend(child.allSubChildren())
+        return tuple(out)
+
+    def setComment(self, comment):
+        self._comment = comment
+
+    def comment(self):
+        return getattr(self, "_comment", "")
+
+    def setGenericFlag(self, flag, value):
+        self._user_data.setdefault("__flags__", {})[flag] = value
+
+    def isGenericFlagSet(self, flag):
+        return self._user_data.get("__flags__", {}).get(flag, False)
+
+    def userData(self, key):
+        return self._user_data.get(key)
+
+    def setUserData(self, key, value):
+        self._user_data[key] = value
+
+    def destroyUserData(self, key):
+        self._user_data.pop(key, None)
+
+    def userDataDict(self):
+        return dict(self._user_data)
+
+
+def _make_hou():
+    mod = types.ModuleType("hou")
+    mod.updateMode = _Enum("AutoUpdate", "OnMouseUp", "Manual")
+    mod.parmTemplateType = _Enum("String", "Int", "Float", "Toggle")
+    mod.stringParmType = _Enum("Regular", "FileReference", "NodeReference")
+    mod.severityType = _Enum("Message", "ImportantMessage", "Warning", "Error")
+    mod.nodeFlag = _Enum("DisplayComment", "Bypass", "Display", "Render")
+    mod.hipFileEventType = _Enum("AfterLoad", "AfterClear", "AfterSave", "BeforeLoad")
+    mod.node = lambda path: _state.site.nodes.get(path)
+    mod.nodeTypeCategories = lambda: dict(_state.site.categories)
+    mod.nodeType = lambda category, name: category.node_types.get(name)
+    mod.fileReferences = lambda *a, **k: tuple(
+        (p, p.unexpandedString()) for n in _state.site.nodes.values() for p in n.parms()
+        if p.parmTemplate().stringType() == "FileReference"
+    )
+    mod.selectedNodes = lambda: tuple(_state.site.selected)
+
+    def _set_update_mode(mode):
+        _state.site.update_mode = mode
+    mod.updateModeSetting = lambda: _state.site.update_mode
+    mod.setUpdateMode = _set_update_mode
+
+    @contextlib.contextmanager
+    def _undo_group(label):
+        _state.site.count("undo_groups")
+        yield
+    mod.undos = types.SimpleNamespace(group=_undo_group)
+    mod.ui = types.SimpleNamespace(setStatusMessage=lambda *a, **k: None)
+    mod.playbar = types.SimpleNamespace(frameRange=lambda: (1001, 1001 + _state.site.frames - 1))
+    mod.hipFile = types.SimpleNamespace(
+        load=lambda *a, **k: None, save=lambda *a, **k: None, clear=lambda *a, **k: None,
+        addEventCallback=lambda cb: _state.site.hip_callbacks.append(cb),
+        removeEventCallback=lambda cb: _state.site.hip_callbacks.remove(cb),
+        name=lambda: "untitled.hip",
+    )
+    mod.isUIAvailable = lambda: False
+    return mod
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Site
+
+STATUSES = ["wip", "rev", "ta", "apr"]
+
+EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+TEMPLATE_DEFINITIONS = {
+    "shot_publish_cache": "shots/{Shot}/publish/cache/{name}/v{version}/{name}.v{version}.abc",
+    "shot_publish_render": "shots/{Shot}/publish/render/{name}/v{version}/{name}.v{version}.{SEQ}.exr",
+}
+
+
+class FakeSite:
+    """
+    A synthetic project. Shot "sh010" is what the scene points at and
+    context_shot (default "sh020") is the shot being updated to.
+
+    root        (str): temp dir holding the project files and config
+    nodes       (int): number of nodes in the scene
+    publishes   (int): distinct publish names (nodes share them round-robin)
+    versions    (int): versions per publish; statuses cycle through STATUSES
+    frames      (int): frames per version of sequence publishes
+    latency     (float): seconds slept per ShotGrid call
+    templates   (int): extra unrelated templates to pad the config with
+    """
+    def __init__(self, root, nodes=100, publishes=50, versions=5, frames=10,
+                 latency=0.0, templates=0, shots=("sh010", "sh020"), context_shot="sh020"):
+        self.root = root
+        self.project_root = os.path.join(root, "proj")
+        self.latency = latency
+        self.frames = frames
+        self.n_versions = versions
+        self.counters = {}
+        self._lock = threading.Lock()
+        self.update_mode = "AutoUpdate"
+        self.selected = []
+        self.hip_callbacks = []
+        self.context_shot = context_shot
+
+        os.makedirs(os.path.join(root, "config", "core"), exist_ok=True)
+        with open(os.path.join(root, "config", "core", "templates.yml"), "w") as f:
+            f.write("# fake\n")
+        self.templates = {}
+        for i in range(templates):
+            self.templates[f"pad_{i:03d}"] = FakeTemplate(
+                self, f"pad_{i:03d}", f"assets/pad{i:03d}/{{step}}/{{name}}/v{{version}}/{{name}}.ma",
+                self.project_root)
+        for name, definition in TEMPLATE_DEFINITIONS.items():
+            self.templates[name] = FakeTemplate(self, name, definition, self.project_root)
+
+        self.project = {"type": "Project", "id": 1, "name": "fake_project"}
+        self.shots = {
+            code: {"type": "Shot", "id": 100 + i, "name": code}
+            for i, code in enumerate(shots)
+        }
+        self.records = {"PublishedFile": [], "Shot": [
+            dict(s, code=s["name"], project=self.project) for s in self.shots.values()
+        ], "Project": [self.project], "EventLogEntry": []}
+        self.publish_names = []
+        pub_id = itertools.count(1)
+        for i in range(publishes):
+            kind = "render" if i % 2 else "cache"
+            name = f"{kind}{i:04d}"
+            self.publish_names.append((name, kind))
+            for shot in self.shots.values():
+                for v in range(1, versions + 1):
+                    self.records["PublishedFile"].append({
+                        "type": "PublishedFile",
+                        "id": next(pub_id),
+                        "project": self.project,
+                        "entity": shot,
+                        "name": name,
+                        "code": name,
+                        "version_number": v,
+                        "sg_status_list": STATUSES[(v - 1) % len(STATUSES)],
+                        "published_file_type": {"type": "PublishedFileType", "id": 1 if kind == "cache" else 2},
+                        "published_file_type.PublishedFileType.code": "Alembic Cache" if kind == "cache" else "Rendered Image",
+                        "updated_at": EPOCH + datetime.timedelta(minutes=v),
+                        "created_at": EPOCH + datetime.timedelta(minutes=v),
+                        "path": {"local_path": self._path(shot["name"], name, kind, v, abstract=True)},
+                    })
+                    self._write_files(shot["name"], name, kind, v)
+
+        self.categories = {"Sop": FakeNodeTypeCategory("Sop")}
+        sop = self.categories["Sop"]
+        for type_name in ("alembic", "file", "null", "xform"):
+            sop.node_types[type_name] = FakeNodeType(self, type_name, sop)
+        root_node = FakeNode(self, "/", None)
+        obj = FakeNode(self, "/obj", None)
+        root_node._children.append(obj)
+        self.nodes = {"/": root_node, "/obj": obj}
+        for i in range(nodes):
+            name, kind = self.publish_names[i % max(1, publishes)]
+            geo = FakeNode(self, f"/obj/geo{i}", None)
+            obj._children.append(geo)
+            self.nodes[geo.path()] = geo
+            node_type = sop.node_types["alembic" if kind == "cache" else "file"]
+            node = FakeNode(self, f"{geo.path()}/{node_type.name()}1", node_type)
+            parm_name = "fileName" if kind == "cache" else "file"
+            node._parms[parm_name] = FakeParm(self, node, parm_name, self._path("sh010", name, kind, 1, abstract=True))
+            geo._children.append(node)
+            self.nodes[node.path()] = node
+            # Non-path nodes the old traversal walked through as well
+            for j, filler in enumerate(("null", "xform")):
+                extra = FakeNode(self, f"{geo.path()}/{filler}{j}", sop.node_types[filler])
+                geo._children.append(extra)
+                self.nodes[extra.path()] = extra
+
+        self.engine = FakeEngine(self)
+
+    def _path(self, shot, name, kind, version, abstract=False, frame=1001):
+        if kind == "cache":
+            fields = {"Shot": shot, "name": name, "version": version}
+            return self.templates["shot_publish_cache"].apply_fields(fields)
+        fields = {"Shot": shot, "name": name, "version": version, "SEQ": "%04d" if abstract else frame}
+        return self.templates["shot_publish_render"].apply_fields(fields)
+
+    def _write_files(self, shot, name, kind, version):
+        frames = [None] if kind == "cache" else range(1001, 1001 + self.frames)
+        for frame in frames:
+            path = self._path(shot, name, kind, version, frame=frame)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "w").close()
+
+    def _log_event(self, event_type, pub, attribute_name=None, meta=None):
+        events = self.records["EventLogEntry"]
+        events.append({
+            "type": "EventLogEntry",
+            "id": len(events) + 1,
+            "event_type": event_type,
+            "attribute_name": attribute_name,
+            "entity": {"type": "PublishedFile", "id": pub["id"], "name": pub["name"]},
+            "project": self.project,
+            "meta": meta or {},
+            "created_at": pub["updated_at"],
+        })
+
+    def _now(self):
+        """Server time for a change: the wall clock, and after every earlier update."""
+        latest = max(p["updated_at"] for p in self.records["PublishedFile"]) + datetime.timedelta(seconds=1)
+        return max(latest, datetime.datetime.now(datetime.timezone.utc))
+
+    def add_publish(self, shot, name, status="apr", version=None):
+        """Publish a new version of name on shot (files on disk + event log)."""
+        pubs = [p for p in self.records["PublishedFile"] if p["name"] == name and p["entity"]["name"] == shot]
+        template = pubs[-1]
+        version = version or max(p["version_number"] for p in pubs) + 1
+        now = self._now()
+        kind = "render" if name.startswith("render") else "cache"
+        pub = dict(template, id=max(p["id"] for p in self.records["PublishedFile"]) + 1,
+                   version_number=version, sg_status_list=status, updated_at=now, created_at=now,
+                   path={"local_path": self._path(shot, name, kind, version, abstract=True)})
+        self.records["PublishedFile"].append(pub)
+        self._write_files(shot, name, kind, version)
+        self._log_event("Shotgun_PublishedFile_New", pub)
+        return pub
+
+    def set_status(self, pub_id, status):
+        """Change a publish's sg_status_list (with its event log entry)."""
+        pub = next(p for p in self.records["PublishedFile"] if p["id"] == pub_id)
+        old = pub["sg_status_list"]
+        pub["sg_status_list"] = status
+        pub["updated_at"] = self._now()
+        self._log_event("Shotgun_PublishedFile_Change", pub, "sg_status_list",
+                        {"attribute_name": "sg_status_list", "old_value": old, "new_value": status})
+        return pub
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset_counters(self):
+        with self._lock:
+            self.counters = {}
+
+    def scene_values(self):
+        return {p.path(): p._value for n in self.nodes.values() for p in n.parms()}
+
+
+_state = types.SimpleNamespace(site=None)
+
+
+def install(root, **site_kwargs):
+    """
+    Build a FakeSite and make it current. The fake sgtk/hou modules are
+    registered on first use and always answer for the current site.
+    """
+    _state.site = FakeSite(root, **site_kwargs)
+    if not getattr(sys.modules.get("sgtk"), "__fake__", False):
+        sys.modules["sgtk"] = _make_sgtk()
+        sys.modules["hou"] = _make_hou()
+    return _state.site
@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+# benchmark.py
+"""
+Benchmark change_shot_in_path, update_all_node_paths and ShotGunQuery
+against the in-process fakes of bench_fakes (no ShotGrid site or Houdini
+licence needed).
+
+Each scenario builds a fresh synthetic site and reports wall time, ShotGrid
+round trips, filesystem calls and parm sets. publish_events also checks the
+publish event watcher (cache invalidation, node flagging) and raises
+AssertionError when it misbehaves.
+
+--imports instead measures how long the entry point modules take to import
+in a fresh interpreter, and whether they pulled in Toolkit, Houdini or Qt.
+
+Usage:
+    benchmark.py [--nodes 400] [--publishes 100] [--versions 10] [--frames 50]
+                 [--latency 0.02] [--templates 200] [--only NAME] [--json FILE]
+    benchmark.py --imports [--json FILE]
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import subprocess
+
+import bench_fakes
+
+# os / glob entry points counted as filesystem calls
+FS_FUNCTIONS = [
+    (os, "scandir"), (os, "listdir"), (os, "stat"),
+    (os.path, "exists"), (os.path, "isdir"), (os.path, "isfile"),
+    (glob, "glob"), (glob, "iglob"),
+]
+
+
+@contextlib.contextmanager
+def count_fs_calls(site):
+    """Count calls to the FS_FUNCTIONS while the block runs."""
+    originals = []
+    for mod, name in FS_FUNCTIONS:
+        func = getattr(mod, name)
+        originals.append((mod, name, func))
+
+        def counted(*args, __func=func, **kwargs):
+            site.count("fs_calls")
+            return __func(*args, **kwargs)
+        setattr(mod, name, counted)
+    try:
+        yield
+    finally:
+        for mod, name, func in originals:
+            setattr(mod, name, func)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Scenarios: fn(site, core) runs the measured work; setup(site, core) runs
+# before measuring (e.g. to warm caches).
+
+def _scene_paths(site):
+    return [v for v in site.scene_values().values() if v]
+
+
+def _serial_paths(site, core):
+    for path in _scene_paths(site):
+        core.change_shot_in_path(path, None, "apr_ta")
+
+
+def _update(mode, version_filter="apr_ta"):
+    def run(site, core):
+        core.update_all_node_paths(version_filter, mode=mode)
+    return run
+
+
+def _incremental(site, core):
+    core.update_all_node_paths("apr_ta", incremental=True)
+
+
+def _query_latest(site, core):
+    query = core.get_query()
+    for name, _ in site.publish_names:
+        query.query_latest(
+            [["project", "is", site.project], ["name", "is", name]],
+            [{"field_name": "version_number", "direction": "desc"}]
+        )
+
+
+def _check(ok, message):
+    if not ok:
+        raise AssertionError(message)
+
+
+def _publish_events(site, core):
+    """
+    Drive PublishEventWatcher.poll() from the site's local event stream:
+    publish a new approved version of one name, poll, and check that only
+    that name's cache entries were dropped and only its nodes were flagged.
+    """
+    from event_watcher import PublishEventWatcher
+    from shotgun_query_helper import FILTER_STATUSES
+    query = core.get_query()
+    events = site.records["EventLogEntry"]
+    watcher = PublishEventWatcher(
+        query, fetch_events=lambda last_id: [e for e in events if e["id"] > last_id]
+    )
+    watcher.last_id = max((e["id"] for e in events), default=0)
+    _check(watcher.poll() == [], "poll with no new events changed publishes")
+
+    shot = site.shots[site.context_shot]
+    status_key = tuple(sorted(FILTER_STATUSES["apr_ta"]))
+    names = sorted(name for name, _ in site.publish_names)
+    changed, other = names[0], names[-1]
+
+    def summary(name):
+        return ("summary", site.project["id"], "Shot", shot["id"], name, status_key)
+
+    _check(summary(changed) in query.cache and summary(other) in query.cache, "summary entries not warm")
+    latest_filters = [["entity", "is", shot], ["name", "is", changed], ["sg_status_list", "is", "apr"]]
+    latest_order = [{"field_name": "version_number", "direction": "desc"}]
+    before = query.query_latest(latest_filters, latest_order)["version_number"]
+
+    pub = site.add_publish(site.context_shot, changed, "apr")
+    pubs = watcher.poll()
+    _check([p["name"] for p in pubs] == [changed], f"poll returned {[p['name'] for p in pubs]}")
+    _check(summary(changed) not in query.cache, f"summary entry of {changed} not invalidated")
+    _check(summary(other) in query.cache, f"summary entry of {other} invalidated")
+    after = query.query_latest(latest_filters, latest_order)["version_number"]
+    _check(after == pub["version_number"] != before, f"query_latest still serves v{after:03d}")
+
+    stale = core.find_stale_parms(pubs, "apr_ta")
+    core.flag_stale_nodes(stale)
+    flagged = {n.path() for n in site.nodes.values() if n.userData(core.STALE_USER_DATA) is not None}
+    expected = {p.rsplit("/", 1)[0] for p, v in site.scene_values().items() if f"/{changed}/" in v}
+    _check(flagged == expected, f"flagged {sorted(flagged)}, expected {sorted(expected)}")
+
+    core.update_all_node_paths("apr_ta", mode="batched")
+    flagged = [n.path() for n in site.nodes.values() if n.userData(core.STALE_USER_DATA) is not None]
+    _check(not flagged, f"still flagged after update: {flagged}")
+
+
+def _rebuild_shots(site, core):
+    core.rebuild_paths_for_shots(_scene_paths(site), list(site.shots), "apr_ta")
+
+
+def _with_index(site, core):
+    core.use_publish_index(os.path.join(site.root, "publish_index.sqlite"))
+
+
+def _prefetch(site, core):
+    import prefetch
+    prefetch.prefetch(wait=True)
+
+
+def _with_manifest(site, core):
+    from publish_table import PublishTable
+    path = os.path.join(site.root, "manifest.json")
+    PublishTable.fetch(core.get_query().shotgun, site.project, list(site.shots.values())).save(path)
+    core.use_publish_manifest(path, site.context_shot)
+
+
+SCENARIOS = {
+    "change_shot_in_path":       (None, _serial_paths),
+    "update_serial":             (None, _update("serial")),
+    "update_batched":            (None, _update("batched")),
+    "update_threaded":           (None, _update("threaded")),
+    "update_batched_warm":       (_update("batched"), _update("batched")),
+    "update_all_filter":         (None, _update("batched", "all")),
+    "update_incremental_warm":   (_incremental, _incremental),
+    "update_after_prefetch":     (_prefetch, _update("serial")),
+    "update_publish_index":      (_with_index, _update("serial")),
+    "update_manifest":           (_with_manifest, _update("batched")),
+    "rebuild_multi_shot":        (None, _rebuild_shots),
+    "publish_events":            (_update("batched"), _publish_events),
+    "query_latest_cold":         (None, _query_latest),
+    "query_latest_warm":         (_query_latest, _query_latest),
+}
+
+
+def run_scenario(name, site_kwargs):
+    root = tempfile.mkdtemp(prefix="bench_")
+    try:
+        site = bench_fakes.install(root, **site_kwargs)
+        import core
+        import instrument
+        instrument.set_quiet()
+        core.reset_session()
+        setup, fn = SCENARIOS[name]
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            if setup:
+                setup(site, core)
+            site.reset_counters()
+            with count_fs_calls(site):
+                start = time.perf_counter()
+                fn(site, core)
+                wall = time.perf_counter() - start
+        return {
+            "scenario": name,
+            "wall": round(wall, 4),
+            "sg_calls": site.counters.get("sg_calls", 0),
+            "fs_calls": site.counters.get("fs_calls", 0),
+            "parm_sets": site.counters.get("parm_sets", 0),
+            "counters": dict(sorted(site.counters.items())),
+            "run": instrument.stats().summary(),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+# Entry points that must import without Toolkit, Houdini or Qt
+IMPORT_TARGETS = ["gui", "core", "batch_update", "resolver_daemon", "prefetch"]
+HEAVY_MODULES = ["sgtk", "tank", "hou", "PySide2"]
+
+_IMPORT_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"wall": time.perf_counter() - start,
+                  "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module, repeat=5):
+    """Best import time of module over repeat fresh interpreters, and the heavy modules it loaded."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=here, capture_output=True, text=True
+        )
+        if proc.returncode:
+            return {"module": module, "error": proc.stderr.strip().splitlines()[-1]}
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        if best is None or r["wall"] < best["wall"]:
+            best = r
+    return {"module": module, "wall": round(best["wall"], 4), "heavy": best["heavy"]}
+
+
+def run_imports(json_path=None):
+    print(f"{'module':<24}{'import (s)':>12}  heavy modules loaded")
+    results = []
+    for module in IMPORT_TARGETS:
+        r = measure_import(module)
+        results.append(r)
+        if "error" in r:
+            print(f"{module:<24}{'failed':>12}  {r['error']}")
+        else:
+            print(f"{module:<24}{r['wall']:>12.4f}  {', '.join(r['heavy']) or '-'}")
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"imports": results}, f, indent=2)
+    return 1 if any("error" in r or r["heavy"] for r in results) else 0
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the node path tools against fakes.")
+    parser.add_argument("--nodes", type=int, default=200)
+    parser.add_argument("--publishes", type=int, default=50)
+    parser.add_argument("--versions", type=int, default=8)
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds per SG call")
+    parser.add_argument("--templates", type=int, default=100, help="extra templates in the config")
+    parser.add_argument("--only", action="append", choices=sorted(SCENARIOS), help="run only these")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--imports", action="store_true", help="measure entry point import times")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    if args.imports:
+        return run_imports(args.json)
+    site_kwargs = {
+        "nodes": args.nodes, "publishes": args.publishes, "versions": args.versions,
+        "frames": args.frames, "latency": args.latency, "templates": args.templates,
+    }
+    print(f"Site: {site_kwargs}")
+    print(f"{'scenario':<24}{'wall (s)':>10}{'sg calls':>10}{'fs calls':>10}{'parm sets':>11}")
+    results = []
+    for name in args.only or SCENARIOS:
+        r = run_scenario(name, site_kwargs)
+        results.append(r)
+        print(f"{name:<24}{r['wall']:>10.4f}{r['sg_calls']:>10}{r['fs_calls']:>10}{r['parm_sets']:>11}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"site": site_kwargs, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(main(sys.argv[1:]))
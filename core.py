@@ -14,9 +14,22 @@ and return the resolved path.
 
 import sys
 import os
-import glob
-import sgtk
-import hou
+import json
+import datetime
+import collections
+import logging
+import types
+from concurrent.futures import ThreadPoolExecutor
+import toolkit_cache
+import disk_scan
+import instrument
+from instrument import log
+from publish_index import PublishIndex
+from publish_table import load_manifest
+from lockfile import Lockfile
+from event_watcher import PublishEventWatcher
+from resolver_daemon import ResolverClient
+from shotgun_query_helper import ShotGunQuery, ShotgunConnectionPool, FILTER_STATUSES, publish_key
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Configure here: node type name → list of parm names holding paths
@@ -26,8 +39,144 @@ NODE_PATH_PARMS = {
     "arnold::procedural": ["dso"],
     # add more node_type: [parm1, parm2] as needed
 }
+
+VERSION_FILTERS = ("all", "apr", "ta", "apr_ta")
+
+# serial: one path at a time, batched: grouped SG queries,
+# threaded: per-path lookups overlapped on a thread pool,
+# daemon: batched in the resident resolver_daemon (in-process if none runs)
+RESOLVE_MODES = ("serial", "batched", "threaded", "daemon")
+MAX_WORKERS = 8
+
+# scene traversal: "types" walks hou.nodeType(...).instances() of the
+# NODE_PATH_PARMS types, "file_references" filters hou.fileReferences()
+TRAVERSAL_BACKENDS = ("types", "file_references")
+
+# One path parm read from the scene (value evaluated exactly once)
+ParmSnapshot = collections.namedtuple("ParmSnapshot", ["node", "parm", "value"])
+
+# Node user data key set on nodes flagged as pointing at an outdated publish
+STALE_USER_DATA = "update_nodes_stale"
+# The artist's comment and comment flag from before flagging, restored on clear
+STALE_COMMENT_USER_DATA = "update_nodes_stale_comment"
+
+# Serve publish lookups from the persistent per-project SQLite index
+USE_PUBLISH_INDEX = os.environ.get("UPDATE_NODES_PUBLISH_INDEX", "") == "1"
+
+# Serve publish lookups from a local manifest (PublishTable JSON or
+# PublishIndex SQLite) instead of ShotGrid; with UPDATE_NODES_SHOT set no
+# Toolkit engine is needed either
+MANIFEST_PATH = os.environ.get("UPDATE_NODES_MANIFEST")
+MANIFEST_SHOT = os.environ.get("UPDATE_NODES_SHOT")
+
+# Node user data key holding {parm name: resolution metadata}, see
+# plan_node_updates(incremental=True)
+RESOLUTION_USER_DATA = "update_nodes_resolution"
+
+# Seconds subtracted from resolved_at when asking ShotGrid what changed
+# since, to absorb the skew between the local and the server clock
+CLOCK_SKEW = 300
+
+# One planned parm update: hou.Node, hou.Parm, current value, resolved value
+ParmChange = collections.namedtuple("ParmChange", ["node", "parm", "old", "new"])
 # ─────────────────────────────────────────────────────────────────────────────
 
+_query = None
+_connection_pool = None
+# project/entity used instead of the engine context when working offline
+_offline_context = None
+_watcher = None
+
+def get_query():
+    """Return the session ShotGunQuery whose cache serves every lookup."""
+    global _query
+    if _query is None:
+        if MANIFEST_PATH:
+            return use_publish_manifest(MANIFEST_PATH, MANIFEST_SHOT)
+        _query = ShotGunQuery()
+        _query.set_shotgun(shot_context=False)
+        if USE_PUBLISH_INDEX:
+            _query.use_index(PublishIndex(_query.project_entity))
+    return _query
+
+
+def use_publish_index(db_path=None):
+    """Switch the session query to the persistent publish index and sync it."""
+    query = get_query()
+    if not isinstance(query.resolver, PublishIndex):
+        query.use_index(PublishIndex(query.project_entity, db_path))
+    return query.resolver
+
+
+def use_publish_manifest(path, shot_name=None):
+    """
+    Resolve against a local publish manifest, loaded once and indexed in
+    memory. With shot_name no Toolkit engine or ShotGrid connection is used;
+    otherwise the target shot still comes from the engine context.
+    """
+    global _query
+    manifest = load_manifest(path)
+    log.info(f"[manifest] Loaded {len(manifest.publishes)} publish(es) from {path}")
+    if shot_name:
+        return use_publish_table(manifest, shot_name)
+    _query = ShotGunQuery()
+    _query.use_resolver(manifest)
+    return _query
+
+
+def use_publish_table(table, shot_name):
+    """
+    Resolve offline against a pre-fetched PublishTable for shot_name, with no
+    Toolkit engine or ShotGrid connection (e.g. in batch worker processes).
+    """
+    global _query, _offline_context
+    entity = table.entity_by_name(shot_name)
+    if not entity:
+        raise ValueError(f"Shot '{shot_name}' not found in publish table")
+    _query = ShotGunQuery()
+    _query.use_resolver(table)
+    _offline_context = types.SimpleNamespace(project=table.project, entity=entity)
+    return _query
+
+
+def _context():
+    """Return the context (project, entity) paths are resolved against."""
+    if _offline_context is not None:
+        return _offline_context
+    import sgtk
+    return sgtk.platform.current_engine().context
+
+
+def get_connection_pool():
+    """Return the session pool of ShotGrid connections for worker threads."""
+    global _connection_pool
+    if _connection_pool is None:
+        _connection_pool = ShotgunConnectionPool(MAX_WORKERS)
+    return _connection_pool
+
+
+def reset_session():
+    """Forget the session query, connection pool, offline context and caches."""
+    global _query, _connection_pool, _offline_context
+    stop_publish_watcher()
+    _query = None
+    _connection_pool = None
+    _offline_context = None
+    toolkit_cache.invalidate()
+    disk_scan.reset_index()
+
+
+def refresh_publish_cache():
+    """Forget cached publishes (or sync the publish index) before the next update."""
+    if _query is not None:
+        _query.refresh()
+
+
+def _find_key(fields, key_name):
+    """Return the field key matching key_name case-insensitively, or None."""
+    return next((k for k in fields if k.lower() == key_name), None)
+
+
 def change_shot_in_path(
     original_path,
     new_shot_name=None,
@@ -41,154 +190,836 @@ def change_shot_in_path(
     new_shot_name   (str): shot code to swap in; if None, uses context.entity.name
     version_filter  (str): one of "all", "apr", "ta", or "apr_ta"
     """
-    print(f"[1] Original path: {original_path}")
-    engine = sgtk.platform.current_engine()
-    sg = engine.shotgun
-    ctx = engine.context
+    log.debug(f"[1] Original path: {original_path}")
+    ctx = _context()
+    query = get_query()
 
     # Determine new shot name
     if not new_shot_name:
         if ctx.entity and ctx.entity.get("name"):
             new_shot_name = ctx.entity["name"]
-            print(f"[1a] No shot specified — using context shot: {new_shot_name}")
+            log.debug(f"[1a] No shot specified — using context shot: {new_shot_name}")
         else:
-            print("[ERROR] No shot provided and no Shot context available.")
+            log.error("[ERROR] No shot provided and no Shot context available.")
             return None
 
     # Step 1: resolve toolkit template and extract fields
     try:
-        tk = sgtk.sgtk_from_path(original_path)
-        template = tk.templates_from_path(original_path)[0]
-        fields = template.get_fields(original_path)
+        with instrument.stage("template", original_path):
+            tk, template, fields = toolkit_cache.template_from_path(original_path)
+        if not template:
+            raise ValueError(f"no template matches {original_path}")
     except Exception as e:
-        print(f"[ERROR] Toolkit/template resolution failed: {e}")
+        log.error(f"[ERROR] Toolkit/template resolution failed: {e}")
         return None
-    print(f"[2] Using template: {template.name}")
-    print("[3] Original fields:")
-    for k, v in sorted(fields.items()): print(f"   {k}: {v}")
+    log.debug(f"[2] Using template: {template.name}")
+    log.debug("[3] Original fields:")
+    if log.isEnabledFor(logging.DEBUG):
+        for k, v in sorted(fields.items()): log.debug(f"   {k}: {v}")
 
     # Swap shot
-    shot_key = next((k for k in fields if k.lower() == "shot"), None) or "shot"
+    shot_key = _find_key(fields, "shot") or "shot"
     fields[shot_key] = new_shot_name
-    print(f"[4] Set '{shot_key}' → '{new_shot_name}'")
+    log.debug(f"[4] Set '{shot_key}' → '{new_shot_name}'")
 
     # Identify version field
-    version_key = next((k for k in fields if k.lower() == "version"), None)
+    version_key = _find_key(fields, "version")
     if not version_key:
-        print("[WARNING] No version field in template — cannot update version.")
+        log.warning("[WARNING] No version field in template — cannot update version.")
         result = template.apply_fields(fields)
-        print(f"[5] New path: {result}")
+        log.debug(f"[5] New path: {result}")
         return result
 
     # Step 2: find original SG publish record by matching fields
-    name_key = next((k for k in fields if k.lower() == "name"), None)
+    name_key = _find_key(fields, "name")
     if not name_key:
-        print("[ERROR] No 'name' field in template — cannot query SG.")
+        log.error("[ERROR] No 'name' field in template — cannot query SG.")
         return None
-    orig_filters = [
-        ["project", "is", ctx.project],
-        ["entity", "is", ctx.entity],
-        ["name", "is", fields[name_key]]#,
-        #["version_number", "is", fields[version_key]]
-    ]
-    # include file type in original lookup
-    orig_pub = sg.find_one(
-        "PublishedFile",
-        orig_filters,
-        ["id","entity","name","version_number","sg_status_list","published_file_type.PublishedFileType.code"]
-    )
-    if not orig_pub:
-        print(f"[ERROR] Could not find original SG publish with filters: {orig_filters}")
-        return None
-    print(f"[5] Found original SG publish id={orig_pub['id']}, v{orig_pub['version_number']}")
+    name = fields[name_key]
 
     # Branch by version_filter
     if version_filter == "all":
+        # include file type in original lookup
+        with instrument.stage("original_lookup", original_path):
+            orig_pub = query.find_original(ctx.entity, name)
+        if not orig_pub:
+            log.error(f"[ERROR] Could not find original SG publish '{name}' on {ctx.entity}")
+            return None
+        log.debug(f"[5] Found original SG publish id={orig_pub['id']}, v{orig_pub['version_number']}")
         # list all versions on disk
-        del fields[version_key]
-        print("[6] Listing all versions on disk for latest (any status)")
-        abstract_paths = tk.abstract_paths_from_template(template, fields)
-        real_paths = []
-        for p in abstract_paths:
-            if "%04d" in p:
-                real_paths.extend(glob.glob(p.replace("%04d","*")))
-            elif os.path.exists(p):
-                real_paths.append(p)
-        if not real_paths:
-            print("[ERROR] No files found on disk for 'all' filter.")
+        log.debug("[6] Listing all versions on disk for latest (any status)")
+        with instrument.stage("disk_scan", original_path):
+            latest = disk_scan.latest_on_disk(template, fields, version_key)
+        if not latest:
+            log.error("[ERROR] No files found on disk for 'all' filter.")
             return None
-        real_paths.sort()
-        latest = real_paths[-1]
-        print(f"[7] Latest on disk: {latest}")
+        log.debug(f"[7] Latest on disk: {latest}")
         return latest
     else:
-        # query SG for all versions by status
-        status_filter = None
-        if version_filter in ("apr","ta"):
-            status_filter = ["sg_status_list","is",version_filter]
-        elif version_filter == "apr_ta":
-            status_filter = ["sg_status_list","in",["apr","ta"]]
-
-        ver_filters = [
-            ["project","is",ctx.project],
-            ["entity","is",orig_pub["entity"]],
-            ["name","is",orig_pub["name"]],
-            ["published_file_type.PublishedFileType.code","is",orig_pub["published_file_type.PublishedFileType.code"]]
-        ]
-        if status_filter:
-            ver_filters.append(status_filter)
-        print(f"[6] Version filters: {ver_filters}")
-        results = sg.find(
-            "PublishedFile", ver_filters,
-            ["version_number"],
-            [{"field_name":"version_number","direction":"asc"}]
-        )
-        ver_list = [r["version_number"] for r in results]
-        if not ver_list:
-            print(f"[WARNING] No SG publishes found for filter '{version_filter}' — using original v{orig_pub['version_number']}")
+        # one summarize (or the session cache) for the original and the
+        # latest version by status
+        statuses = FILTER_STATUSES.get(version_filter)
+        log.debug(f"[5] Original and latest '{name}' with status in {statuses}")
+        with instrument.stage("version_query", original_path):
+            originals, latest = query.find_latest(ctx.entity, [name], statuses)
+        orig_pub = originals.get(name)
+        if not orig_pub:
+            log.error(f"[ERROR] Could not find original SG publish '{name}' on {ctx.entity}")
+            return None
+        log.debug(f"[6] Found original SG publish id={orig_pub['id']}")
+        latest_v = latest.get(publish_key(orig_pub))
+        if latest_v is None:
+            if orig_pub["version_number"] is None:
+                with instrument.stage("original_lookup", original_path):
+                    orig_pub = query.find_original(ctx.entity, name)
+            log.warning(f"[WARNING] No SG publishes found for filter '{version_filter}' — using original v{orig_pub['version_number']}")
             latest_v = orig_pub["version_number"]
-        else:
-            latest_v = ver_list[-1]
-        print(f"[7] SG versions: {ver_list} → latest {latest_v}")
+        log.debug(f"[7] SG latest → v{latest_v}")
         fields[version_key] = latest_v
         try:
             new_path = template.apply_fields(fields)
-            print(f"[8] New path: {new_path}")
+            log.debug(f"[8] New path: {new_path}")
             return new_path
         except Exception as e:
-            print(f"[ERROR] Rebuild path failed: {e}")
+            log.error(f"[ERROR] Rebuild path failed: {e}")
             return None
 
 
-def update_all_node_paths(version_filter="apr_ta"):
+def resolve_paths_batched(
+    original_paths,
+    new_shot_name=None,
+    version_filter="apr_ta",
+    publishes=None,
+    entity=None
+):
+    """
+    Batched version of change_shot_in_path for many paths at once.
+
+    Templates are resolved per path, then every original publish lookup and
+    every version lookup is settled with one summarize per BATCH_SIZE names
+    instead of two round trips per path (cached publishes are not queried
+    again).
+
+    original_paths  (list): full existing file paths
+    new_shot_name   (str): shot code to swap in; if None, uses context.entity.name
+    version_filter  (str): one of "all", "apr", "ta", or "apr_ta"
+    publishes       (dict): if given, filled with original path → (publish,
+                    version) for every path resolved through a publish: the
+                    target shot's original publish (ORIGINAL_FIELDS) and the
+                    version picked, None for the "all" filter (taken from disk)
+    entity          (dict): entity the publishes are looked up on; defaults to
+                    context.entity
+
+    Returns a dict of original path → resolved path (None when unresolved).
+    """
+    ctx = _context()
+    entity = entity or ctx.entity
+    query = get_query()
+    results = {}
+
+    if not new_shot_name:
+        if entity and entity.get("name"):
+            new_shot_name = entity["name"]
+        else:
+            log.error("[ERROR] No shot provided and no Shot context available.")
+            return dict.fromkeys(original_paths)
+
+    # Step 1: resolve templates and collect what each path needs from SG
+    pending = {}
+    for path in dict.fromkeys(original_paths):
+        try:
+            with instrument.stage("template", path):
+                tk, template, fields = toolkit_cache.template_from_path(path)
+            if not template:
+                raise ValueError("no template matches path")
+        except Exception as e:
+            log.error(f"[ERROR] Toolkit/template resolution failed for {path}: {e}")
+            results[path] = None
+            continue
+        fields[_find_key(fields, "shot") or "shot"] = new_shot_name
+        version_key = _find_key(fields, "version")
+        if not version_key:
+            results[path] = template.apply_fields(fields)
+            continue
+        name_key = _find_key(fields, "name")
+        if not name_key:
+            log.error(f"[ERROR] No 'name' field in template for {path} — cannot query SG.")
+            results[path] = None
+            continue
+        pending[path] = (tk, template, fields, version_key, fields[name_key])
+    log.info(f"[batch] {len(pending)} paths need SG resolution")
+
+    # Step 2: original publishes and their latest versions by status for
+    # every distinct name, in one summarize per chunk of names
+    names = sorted({p[4] for p in pending.values()})
+    latest = {}
+    if version_filter == "all":
+        with instrument.stage("original_lookup"):
+            orig_pubs = query.find_originals(entity, names)
+    else:
+        with instrument.stage("version_query"):
+            orig_pubs, latest = query.find_latest(entity, names, FILTER_STATUSES.get(version_filter))
+        # Step 3: full original records only where the original version is
+        # the fallback (no publish matches the filter)
+        fallback = [n for n, pub in orig_pubs.items() if publish_key(pub) not in latest]
+        if fallback:
+            with instrument.stage("original_lookup"):
+                orig_pubs.update(query.find_originals(entity, fallback))
+        log.info(f"[batch] Resolved latest versions for {len(latest)}/{len(orig_pubs)} publishes")
+    log.info(f"[batch] Found {len(orig_pubs)}/{len(names)} original SG publishes")
+
+    # Step 4: map results back to each path
+    for path, (tk, template, fields, version_key, name) in pending.items():
+        orig_pub = orig_pubs.get(name)
+        if not orig_pub:
+            log.error(f"[ERROR] Could not find original SG publish '{name}' for {path}")
+            results[path] = None
+            continue
+        if version_filter == "all":
+            with instrument.stage("disk_scan", path):
+                results[path] = disk_scan.latest_on_disk(template, fields, version_key)
+            if publishes is not None and results[path]:
+                publishes[path] = (orig_pub, None)
+            continue
+        fields[version_key] = latest.get(publish_key(orig_pub), orig_pub["version_number"])
+        try:
+            results[path] = template.apply_fields(fields)
+        except Exception as e:
+            log.error(f"[ERROR] Rebuild path failed for {path}: {e}")
+            results[path] = None
+            continue
+        if publishes is not None:
+            publishes[path] = (orig_pub, fields[version_key])
+    return results
+
+
+def resolve_paths_threaded(
+    original_paths,
+    new_shot_name=None,
+    version_filter="apr_ta",
+    max_workers=MAX_WORKERS
+):
+    """
+    Resolve many paths with change_shot_in_path on a bounded thread pool.
+    Each worker runs its SG lookups on its own pooled connection; templates are
+    warmed on the calling thread first. Nothing here touches the scene.
+
+    Returns a dict of original path → resolved path (None when unresolved).
+    """
+    paths = list(dict.fromkeys(original_paths))
+    for path in paths:
+        try:
+            toolkit_cache.template_from_path(path)
+        except Exception:
+            pass  # reported by change_shot_in_path
+    query = get_query()
+    pool = get_connection_pool()
+
+    def _work(path):
+        if query.offline:
+            return change_shot_in_path(path, new_shot_name, version_filter)
+        with pool.connection() as sg, query.use_connection(sg):
+            return change_shot_in_path(path, new_shot_name, version_filter)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, pool.size)) as executor:
+        return dict(zip(paths, executor.map(_work, paths)))
+
+
+def rebuild_paths_for_shots(source_paths, shots, version_filter="apr_ta"):
+    """
+    Rebuild every source path for every shot in one go: each template is
+    resolved once, and the publishes of all shots are fetched with a single
+    'entity in' query instead of two queries per (path, shot).
+
+    source_paths    (list): full existing file paths
+    shots           (list): shot codes to rebuild the paths for
+    version_filter  (str): one of "all", "apr", "ta", or "apr_ta"
+
+    Returns {source_path: {shot: resolved path or None}}.
+    """
+    query = get_query()
+    matrix = {path: dict.fromkeys(shots) for path in source_paths}
+
+    # Step 1: one template resolution per source path
+    parsed = {}
+    for path in dict.fromkeys(source_paths):
+        try:
+            with instrument.stage("template", path):
+                tk, template, fields = toolkit_cache.template_from_path(path)
+            if not template:
+                raise ValueError("no template matches path")
+        except Exception as e:
+            log.error(f"[ERROR] Toolkit/template resolution failed for {path}: {e}")
+            continue
+        parsed[path] = (
+            template, fields, _find_key(fields, "shot") or "shot",
+            _find_key(fields, "version"), _find_key(fields, "name")
+        )
+
+    # Step 2: shot entities and every publish of every shot at once
+    with instrument.stage("original_lookup"):
+        entities = query.find_shots(shots)
+    missing = [s for s in shots if s not in entities]
+    if missing:
+        log.error(f"[ERROR] Shots not found in ShotGrid: {missing}")
+    names = sorted({fields[name_key] for _, fields, _, _, name_key in parsed.values() if name_key})
+    with instrument.stage("version_query"):
+        originals, latest = query.publish_matrix(
+            list(entities.values()), names, FILTER_STATUSES.get(version_filter)
+        )
+    log.info(f"[shots] {len(parsed)} path(s) × {len(entities)} shot(s), {len(originals)} publish(es) found")
+
+    # Step 3: fill the matrix
+    for path, (template, fields, shot_key, version_key, name_key) in parsed.items():
+        for shot, entity in entities.items():
+            shot_fields = dict(fields, **{shot_key: shot})
+            if not version_key:
+                matrix[path][shot] = template.apply_fields(shot_fields)
+                continue
+            orig_pub = originals.get((entity["type"], entity["id"], fields.get(name_key)))
+            if not name_key or not orig_pub:
+                continue
+            if version_filter == "all":
+                with instrument.stage("disk_scan", path):
+                    matrix[path][shot] = disk_scan.latest_on_disk(template, shot_fields, version_key)
+                continue
+            shot_fields[version_key] = latest.get(publish_key(orig_pub), orig_pub["version_number"])
+            try:
+                matrix[path][shot] = template.apply_fields(shot_fields)
+            except Exception as e:
+                log.error(f"[ERROR] Rebuild path failed for {path} on {shot}: {e}")
+    return matrix
+
+
+def resolve_paths(
+    original_paths,
+    new_shot_name=None,
+    version_filter="apr_ta",
+    mode="serial"
+):
+    """
+    Resolve many paths using one of RESOLVE_MODES.
+    Returns a dict of original path → resolved path (None when unresolved).
+    """
+    if mode not in RESOLVE_MODES:
+        raise ValueError(f"Unknown resolve mode '{mode}', expected one of {', '.join(RESOLVE_MODES)}")
+    if mode == "batched":
+        return resolve_paths_batched(original_paths, new_shot_name, version_filter)
+    if mode == "threaded":
+        return resolve_paths_threaded(original_paths, new_shot_name, version_filter)
+    if mode == "daemon":
+        ctx = _context()
+        shot = new_shot_name or ctx.entity["name"]
+        try:
+            return ResolverClient().resolve(ctx.project["id"], original_paths, shot, version_filter)
+        except OSError:
+            log.warning("[WARNING] No resolver daemon listening — resolving in-process")
+        except RuntimeError as e:
+            # Daemon-side error (e.g. other project, unknown shot there)
+            log.warning(f"[WARNING] {e} — resolving in-process")
+        return resolve_paths_batched(original_paths, new_shot_name, version_filter)
+    return {
+        path: change_shot_in_path(path, new_shot_name, version_filter)
+        for path in dict.fromkeys(original_paths)
+    }
+
+
+def _is_file_parm(parm):
+    """Return True for string parms of the file reference type."""
+    import hou
+    tmpl = parm.parmTemplate()
+    return (tmpl.type() == hou.parmTemplateType.String
+            and tmpl.stringType() == hou.stringParmType.FileReference)
+
+
+def _node_type_instances(type_names):
+    """Yield every instance of the named node types, in any category."""
+    import hou
+    for category in hou.nodeTypeCategories().values():
+        for type_name in type_names:
+            node_type = hou.nodeType(category, type_name)
+            if node_type:
+                yield from node_type.instances()
+
+
+def collect_path_parms(nodes=None, backend="types", discover=False):
+    """
+    Collect the path parms to update as ParmSnapshot records, reading each
+    parm's value once and skipping empty values and locked HDA contents.
+
+    nodes     (list): only look at these nodes; the whole scene if None
+    backend   (str): one of TRAVERSAL_BACKENDS, used when nodes is None
+    discover  (bool): also include file reference parms not in NODE_PATH_PARMS
+    """
+    import hou
+    parms = []
+    if nodes is not None:
+        for node in nodes:
+            parms.extend(filter(None, (node.parm(n) for n in NODE_PATH_PARMS.get(node.type().name(), []))))
+            if discover:
+                parms.extend(p for p in node.parms() if _is_file_parm(p))
+    elif backend == "file_references" or discover:
+        for parm, _ in hou.fileReferences():
+            if parm is None:
+                continue
+            if discover or parm.name() in NODE_PATH_PARMS.get(parm.node().type().name(), []):
+                parms.append(parm)
+    if nodes is None and backend == "types":
+        for node in _node_type_instances(NODE_PATH_PARMS):
+            parms.extend(filter(None, (node.parm(n) for n in NODE_PATH_PARMS[node.type().name()])))
+
+    snapshots = []
+    seen = set()
+    for parm in parms:
+        node = parm.node()
+        key = (node.sessionId(), parm.name())
+        if key in seen or node.isInsideLockedHDA():
+            continue
+        seen.add(key)
+        value = parm.evalAsString()
+        if value:
+            snapshots.append(ParmSnapshot(node, parm, value))
+    return snapshots
+
+
+def find_stale_parms(pubs, version_filter="apr_ta", snapshots=None):
+    """
+    Return (ParmSnapshot, publish) pairs for the parms (whole scene unless
+    snapshots is given) that point at an older version of one of pubs which
+    version_filter would now resolve to.
+    """
+    statuses = FILTER_STATUSES.get(version_filter)
+    newest = {}
+    for pub in pubs:
+        if statuses and pub.get("sg_status_list") not in statuses:
+            continue
+        key = (pub["entity"].get("name"), pub["name"])
+        if key not in newest or pub["version_number"] > newest[key]["version_number"]:
+            newest[key] = pub
+    if not newest:
+        return []
+    stale = []
+    for snap in collect_path_parms() if snapshots is None else snapshots:
+        try:
+            _, template, fields = toolkit_cache.template_from_path(snap.value)
+        except Exception:
+            continue
+        version_key = _find_key(fields, "version")
+        if not template or not version_key:
+            continue
+        pub = newest.get((fields.get(_find_key(fields, "shot")), fields.get(_find_key(fields, "name"))))
+        if pub and fields[version_key] < pub["version_number"]:
+            stale.append((snap, pub))
+    return stale
+
+
+def flag_stale_nodes(stale):
+    """
+    Mark nodes from find_stale_parms with a comment and STALE_USER_DATA. The
+    node's own comment is kept in STALE_COMMENT_USER_DATA until cleared.
+    """
+    import hou
+    for snap, pub in stale:
+        if snap.node.userData(STALE_USER_DATA) is None:
+            snap.node.setUserData(STALE_COMMENT_USER_DATA, json.dumps({
+                "comment": snap.node.comment(),
+                "display": snap.node.isGenericFlagSet(hou.nodeFlag.DisplayComment),
+            }))
+        snap.node.setUserData(STALE_USER_DATA, str(pub["version_number"]))
+        snap.node.setComment(f"Newer publish: {pub['name']} v{pub['version_number']:03d} ({pub.get('sg_status_list')})")
+        snap.node.setGenericFlag(hou.nodeFlag.DisplayComment, True)
+        log.info(f"[events] {snap.parm.path()} is out of date → v{pub['version_number']:03d}")
+
+
+def _clear_stale_flag(node):
+    import hou
+    saved = node.userData(STALE_COMMENT_USER_DATA)
+    previous = json.loads(saved) if saved else {"comment": "", "display": False}
+    node.destroyUserData(STALE_USER_DATA)
+    node.destroyUserData(STALE_COMMENT_USER_DATA)
+    node.setComment(previous["comment"])
+    node.setGenericFlag(hou.nodeFlag.DisplayComment, previous["display"])
+
+
+def _run_on_main_thread(fn):
+    """Defer fn to Houdini's main thread when running inside the UI."""
+    try:
+        import hdefereval
+    except ImportError:
+        fn()
+        return
+    hdefereval.executeDeferred(fn)
+
+
+def start_publish_watcher(interval=15.0, flag_nodes=True, version_filter="apr_ta", fetch_events=None):
+    """
+    Start tailing ShotGrid publish events for the session query: affected
+    cache entries are invalidated and, with flag_nodes, scene nodes whose
+    publish has a newer version are flagged. fetch_events overrides the event
+    source (see PublishEventWatcher).
+    """
+    global _watcher
+    stop_publish_watcher()
+
+    def on_change(pubs):
+        if flag_nodes:
+            _run_on_main_thread(lambda: flag_stale_nodes(find_stale_parms(pubs, version_filter)))
+
+    _watcher = PublishEventWatcher(get_query(), fetch_events=fetch_events, on_change=on_change, interval=interval)
+    _watcher.start()
+    return _watcher
+
+
+def stop_publish_watcher():
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
+
+
+def _resolution_metadata(node):
+    """Return the {parm name: metadata} dict stored on node, or {}."""
+    data = node.userData(RESOLUTION_USER_DATA)
+    if not data:
+        return {}
+    try:
+        return json.loads(data)
+    except ValueError:
+        return {}
+
+
+def plan_resolutions(snapshots, resolved, publishes, version_filter, shot_name):
+    """
+    Return {parm path: (snapshot, metadata)} for every snapshot resolved
+    through a publish: what its path resolved to and from which publish, for
+    record_resolutions(). Nothing is written to the scene. Nothing is planned
+    for the "all" filter: it resolves from disk, where a new version shows no
+    ShotGrid update for unchanged_parms() to notice.
+    """
+    if version_filter == "all":
+        return {}
+    now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    plan = {}
+    for snap in snapshots:
+        newp = resolved.get(snap.value)
+        pub, version = publishes.get(snap.value, (None, None))
+        if not newp or not pub:
+            continue
+        plan[snap.parm.path()] = (snap, {
+            "path": newp,
+            "publish_id": pub["id"],
+            "version": version,
+            "entity": [pub["entity"]["type"], pub["entity"]["id"]],
+            "name": pub["name"],
+            "filter": version_filter,
+            "shot": shot_name,
+            "resolved_at": now,
+        })
+    return plan
+
+
+def record_resolutions(resolutions):
+    """
+    Store on each node the metadata of its (snapshot, metadata) resolutions,
+    so the next incremental run can skip those parms unless their publish
+    changed. Must run on the main thread.
+    """
+    by_node = {}
+    for snap, meta in resolutions:
+        node_meta = by_node.setdefault(snap.node.sessionId(), (snap.node, _resolution_metadata(snap.node)))[1]
+        node_meta[snap.parm.name()] = meta
+    for node, meta in by_node.values():
+        node.setUserData(RESOLUTION_USER_DATA, json.dumps(meta))
+
+
+def unchanged_parms(snapshots, version_filter, shot_name):
+    """
+    Return the snapshots whose recorded resolution still holds: the parm
+    still holds the recorded path for the same filter and shot, and no
+    publish of that name on that entity was updated since it was resolved.
+    Costs one ShotGrid query per entity; changed publishes are dropped from
+    the session cache on the way. Never skips anything for the "all" filter
+    (see plan_resolutions).
+    """
+    if version_filter == "all":
+        return []
+    query = get_query()
+    candidates = []
+    groups = {}     # entity → ({name, ...}, oldest resolved_at)
+    for snap in snapshots:
+        meta = _resolution_metadata(snap.node).get(snap.parm.name())
+        if not meta or meta.get("path") != snap.value:
+            continue
+        if meta.get("filter") != version_filter or meta.get("shot") != shot_name:
+            continue
+        entity = tuple(meta["entity"])
+        resolved_at = datetime.datetime.fromisoformat(meta["resolved_at"])
+        names, since = groups.get(entity, (set(), resolved_at))
+        names.add(meta["name"])
+        groups[entity] = (names, min(since, resolved_at))
+        candidates.append((snap, entity, meta["name"]))
+
+    changed = set()
+    for (ent_type, ent_id), (names, since) in groups.items():
+        entity = {"type": ent_type, "id": ent_id}
+        with instrument.stage("change_check"):
+            pubs = query.changed_publishes(
+                entity, sorted(names), since - datetime.timedelta(seconds=CLOCK_SKEW)
+            )
+        if pubs is None:
+            changed.update((ent_type, ent_id, name) for name in names)
+            continue
+        for pub in pubs:
+            query.invalidate_publish(pub)
+            changed.add((ent_type, ent_id, pub["name"]))
+    return [snap for snap, entity, name in candidates if entity + (name,) not in changed]
+
+
+def begin_run():
+    """
+    Start a new update run: fresh stats, config check, empty disk index and,
+    if due, a sync of the persistent publish index (see ShotGunQuery.sync_index).
+    """
+    instrument.start_run()
+    toolkit_cache.invalidate_if_config_changed()
+    disk_scan.reset_index()
+    if _query is not None:
+        _query.sync_index()
+
+
+def plan_node_updates(
+    nodes=None,
+    version_filter="apr_ta",
+    mode="serial",
+    backend="types",
+    discover=False,
+    incremental=False,
+    validate=True,
+    resolutions=None
+):
+    """
+    Planning phase: resolve every path parm of nodes (whole scene if None)
+    found by collect_path_parms without setting any parm.
+    With incremental, parms whose recorded resolution still holds (see
+    unchanged_parms) are skipped and the rest are resolved batched; if
+    resolutions is a dict it is filled for apply_node_updates() to record
+    on the nodes for the next run (see plan_resolutions).
+    With validate, changes whose new path is missing on disk are dropped
+    (see reject_missing_targets).
+    Returns a list of ParmChange for the parms whose path would change.
+    """
+    begin_run()
+    snapshots = collect_path_parms(nodes, backend, discover)
+    instrument.count("parms", len(snapshots))
+    for snap in snapshots:
+        log.debug(f"-- {snap.parm.path()} = {snap.value}")
+    if incremental:
+        shot_name = _context().entity["name"]
+        skipped = {id(snap) for snap in unchanged_parms(snapshots, version_filter, shot_name)}
+        snapshots = [snap for snap in snapshots if id(snap) not in skipped]
+        instrument.count("parms_skipped", len(skipped))
+        log.info(f">>> Incremental: {len(skipped)} parm(s) unchanged, {len(snapshots)} to resolve")
+        publishes = {}
+        resolved = resolve_paths_batched(
+            [snap.value for snap in snapshots], None, version_filter, publishes
+        )
+        if resolutions is not None:
+            resolutions.update(plan_resolutions(snapshots, resolved, publishes, version_filter, shot_name))
+    else:
+        resolved = resolve_paths([snap.value for snap in snapshots], None, version_filter, mode)
+    changes = []
+    for snap in snapshots:
+        newp = resolved.get(snap.value)
+        if newp and newp != snap.value:
+            changes.append(ParmChange(snap.node, snap.parm, snap.value, newp))
+    if validate:
+        changes = reject_missing_targets(changes)
+    log.info(f">>> Planned {len(changes)} change(s) over {len(snapshots)} parm(s)")
+    return changes
+
+
+def reject_missing_targets(changes, frame_range=None):
+    """
+    Check the new path of every change on disk, concurrently, and drop the
+    changes whose target is missing. Sequences are checked by the first and
+    last frame of frame_range (the playbar range if None).
+    Returns the changes safe to apply.
+    """
+    import hou
+    if not changes:
+        return changes
+    if frame_range is None:
+        start, end = hou.playbar.frameRange()
+        frame_range = (int(start), int(end))
+    with instrument.stage("validate"):
+        found = disk_scan.validate_paths([c.new for c in changes], frame_range)
+    kept = [c for c in changes if found[c.new]]
+    for change in changes:
+        if not found[change.new]:
+            log.error(f"[ERROR] Missing target for {change.parm.path()}: {change.new} — left unchanged")
+    instrument.count("missing_targets", len(changes) - len(kept))
+    return kept
+
+
+def apply_node_updates(changes, label="Update node paths", resolutions=None):
+    """
+    Apply phase: set every planned ParmChange inside one undo group with the
+    update mode switched to manual, so nothing recooks until all parms are set.
+    If a set fails, parms already set are restored to their unexpanded
+    strings before re-raising.
+    resolutions from plan_node_updates are recorded in the same undo group,
+    for the parms set here and the parms already holding their resolved path.
+    """
+    import hou
+    if not changes and not resolutions:
+        return
+    update_mode = hou.updateModeSetting()
+    applied = []    # (change, unexpanded string before the set)
+    step = "start"
+    with hou.undos.group(label):
+        hou.setUpdateMode(hou.updateMode.Manual)
+        try:
+            for change in changes:
+                step = change.parm.path()
+                # The raw string, so $HIP / $JOB / $F expressions survive a restore
+                raw = change.parm.unexpandedString()
+                with instrument.stage("parm_set", step):
+                    change.parm.set(change.new)
+                applied.append((change, raw))
+                if change.node.userData(STALE_USER_DATA) is not None:
+                    _clear_stale_flag(change.node)
+                log.info(f"-- {step} → {change.new}")
+            if resolutions:
+                step = "recording resolutions"
+                applied_parms = {change.parm.path() for change, _ in applied}
+                record_resolutions([
+                    (snap, meta) for parm_path, (snap, meta) in resolutions.items()
+                    if parm_path in applied_parms or snap.value == meta["path"]
+                ])
+        except Exception:
+            log.error(f"[ERROR] Failed on {step} — restoring {len(applied)} parm(s)")
+            for done, raw in reversed(applied):
+                done.parm.set(raw)
+            raise
+        finally:
+            hou.setUpdateMode(update_mode)
+
+
+def update_all_node_paths(version_filter="apr_ta", mode="serial", summary_path=None, incremental=False):
     """
     Scan Houdini scene and update path parms for nodes in NODE_PATH_PARMS.
     version_filter passed to change_shot_in_path.
+    mode is one of RESOLVE_MODES; parms are always set on the calling thread.
+    summary_path, if given, receives the run's timings and counters as JSON.
+    incremental only re-resolves parms whose publishes changed since the
+    previous incremental run (see plan_node_updates).
+    Returns the applied list of ParmChange.
     """
-    print(f">>> Updating node paths (filter='{version_filter}')...")
-    for node in hou.node("/").allSubChildren():
-        for parm_name in NODE_PATH_PARMS.get(node.type().name(), []):
-            parm = node.parm(parm_name)
-            if parm:
-                orig = parm.evalAsString()
-                if orig:
-                    print(f"-- {node.path()}:{parm_name} = {orig}")
-                    newp = change_shot_in_path(orig, None, version_filter)
-                    if newp and newp != orig:
-                        parm.set(newp)
-                        print(f"   → {newp}")
+    log.info(f">>> Updating node paths (filter='{version_filter}', mode='{mode}')...")
+    resolutions = {}
+    changes = plan_node_updates(None, version_filter, mode, incremental=incremental, resolutions=resolutions)
+    apply_node_updates(changes, resolutions=resolutions)
+    instrument.count("parm_changes", len(changes))
+    instrument.stats().log_summary()
+    if summary_path:
+        instrument.stats().write(summary_path)
+    return changes
+
+def export_lockfile(lock_path, version_filter="apr_ta", nodes=None, shot_name=None):
+    """
+    Resolve every path parm of nodes (whole scene if None) once and write the
+    unexpanded parm string → (resolved path, publish id, version) mapping to
+    lock_path, so farm tasks can apply the exact same resolution with
+    apply_lockfile(). Keying by the unexpanded string keeps $F-driven parms
+    matching on any frame; such a string is resolved as is when its template
+    accepts it, so the locked path keeps its frame token.
+    Returns the Lockfile.
+    """
+    begin_run()
+    snapshots = collect_path_parms(nodes)
+    raws = {snap.parm.path(): snap.parm.unexpandedString() for snap in snapshots}
+    publishes = {}
+    resolved = resolve_paths_batched(
+        [snap.value for snap in snapshots] + [raw for raw in raws.values() if disk_scan.FRAME_TOKEN.search(raw)],
+        shot_name, version_filter, publishes
+    )
+    ctx = _context()
+    lock = Lockfile(
+        project=ctx.project, shot=shot_name or ctx.entity.get("name"), version_filter=version_filter
+    )
+    for snap in snapshots:
+        raw = raws[snap.parm.path()]
+        original = raw if resolved.get(raw) else snap.value
+        path = resolved.get(original)
+        if path:
+            pub, version = publishes.get(original, (None, None))
+            lock.add(raw, path, pub and pub["id"], version)
+    lock.save(lock_path)
+    log.info(f">>> Locked {len(lock)} path(s) into {lock_path}")
+    return lock
+
+
+def apply_lockfile(lock_path, nodes=None):
+    """
+    Set path parms of nodes (whole scene if None) from a lockfile, with no
+    Toolkit or ShotGrid lookup: one dict lookup per parm, by its unexpanded
+    string. Parms not in the lockfile are left untouched. Returns the applied
+    ParmChanges.
+    """
+    begin_run()
+    lock = Lockfile.load(lock_path)
+    snapshots = collect_path_parms(nodes)
+    changes = []
+    missing = 0
+    for snap in snapshots:
+        raw = snap.parm.unexpandedString()
+        newp = lock.resolve(raw)
+        if newp is None:
+            missing += 1
+        elif newp != raw:
+            changes.append(ParmChange(snap.node, snap.parm, raw, newp))
+    if missing:
+        log.warning(f"[WARNING] {missing} parm path(s) not in {lock_path} — left unchanged")
+    changes = reject_missing_targets(changes)
+    apply_node_updates(changes, label="Apply path lockfile")
+    instrument.count("parm_changes", len(changes))
+    instrument.stats().log_summary()
+    return changes
+
 
 if __name__ == "__main__":
     args = sys.argv[1:]
+    if "--quiet" in args:
+        instrument.set_quiet()
+    if "--verbose" in args:
+        instrument.set_verbose()
+    args = [a for a in args if a not in ("--quiet", "--verbose")]
     if args and args[0] == "--update-nodes":
+        mode = next((a.split("=", 1)[1] for a in args if a.startswith("--mode=")), "serial")
+        if mode not in RESOLVE_MODES:
+            log.error(f"[ERROR] Unknown --mode={mode}, expected one of {'|'.join(RESOLVE_MODES)}")
+            sys.exit(1)
+        summary = next((a.split("=", 1)[1] for a in args if a.startswith("--summary=")), None)
+        incremental = "--incremental" in args
+        args = [a for a in args if not a.startswith(("--mode=", "--summary=", "--incremental"))]
         vf = args[1] if len(args)>1 else "apr_ta"
-        update_all_node_paths(vf)
+        update_all_node_paths(vf, mode=mode, summary_path=summary, incremental=incremental)
+        sys.exit(0)
+    if args and args[0] in ("--export-lock", "--apply-lock") and len(args) > 1:
+        if args[0] == "--export-lock":
+            export_lockfile(args[1], args[2] if len(args) > 2 else "apr_ta")
+        else:
+            apply_lockfile(args[1])
         sys.exit(0)
     if not args:
-        print("Usage: change_shot_name.py <path> [new_shot] [all|apr|ta|apr_ta]")
+        print("Usage: change_shot_name.py <path> [new_shot] [all|apr|ta|apr_ta] [--quiet|--verbose]")
+        print("       change_shot_name.py --update-nodes [all|apr|ta|apr_ta] [--mode=serial|batched|threaded|daemon]")
+        print("                           [--summary=run.json] [--incremental] [--quiet|--verbose]")
+        print("       change_shot_name.py --export-lock FILE [all|apr|ta|apr_ta]")
+        print("       change_shot_name.py --apply-lock FILE")
         sys.exit(1)
     orig = args[0]
-    shot = args[1] if len(args)>1 and args[1] not in ("all","apr","ta","apr_ta") else None
-    vf = args[-1] if args[-1] in ("all","apr","ta","apr_ta") else "apr_ta"
+    shot = args[1] if len(args)>1 and args[1] not in VERSION_FILTERS else None
+    vf = args[-1] if args[-1] in VERSION_FILTERS else "apr_ta"
     result = change_shot_in_path(orig, shot, vf)
     sys.exit(0 if result else 2)
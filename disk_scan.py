@@ -0,0 +1,205 @@
+"""
+os.scandir based scan engine for finding versions on disk.
+
+Instead of globbing every frame of every version, the version directory is
+listed once, version numbers are parsed as integers, and candidates are tried
+highest first. A frame sequence only needs one matching frame to count as
+present, so frame directories are scanned until the first hit rather than
+listed in full. Directory listings are kept in a DirectoryIndex for the rest
+of the run; call reset_index() at the start of a new run.
+
+validate_paths() checks resolved paths before they are set, concurrently: a
+frame sequence is checked by its first and last frame only.
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import instrument
+
+# Substituted for the version field to locate it in a rendered template path
+SENTINEL_VERSION = 987654321
+
+# Frame number tokens: %04d, %d, $F, $F4, ####, @@@
+FRAME_TOKEN = re.compile(r"%0?\d*d|\$F\d*|#+|@+")
+
+# Threads statting paths in validate_paths (I/O bound, network storage)
+VALIDATE_WORKERS = 16
+
+
+def frame_path(path, frame):
+    """Return path with every frame token replaced by frame (padded as the token says)."""
+    def _pad(m):
+        token = m.group(0)
+        if token.startswith("%"):
+            return token % frame
+        if token.startswith("$F"):
+            return str(frame).zfill(int(token[2:] or 0))
+        return str(frame).zfill(len(token))
+    return FRAME_TOKEN.sub(_pad, path)
+
+
+def _component_regex(component, sentinel=None):
+    """Compile a regex for one path component, capturing the version digits."""
+    pattern = ""
+    pos = 0
+    tokens = [(m.start(), m.end(), r"\d+") for m in FRAME_TOKEN.finditer(component)]
+    if sentinel:
+        tokens += [(m.start(), m.end(), r"(\d+)") for m in re.finditer(re.escape(sentinel), component)]
+    for start, end, replacement in sorted(tokens):
+        pattern += re.escape(component[pos:start]) + replacement
+        pos = end
+    return re.compile(pattern + re.escape(component[pos:]) + "$")
+
+
+class DirectoryIndex:
+    """Run-scoped cache of directory listings and frame-sequence probes."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listings = {}
+        self._probes = {}
+        self.scandir_calls = 0
+
+    def listdir(self, dirpath):
+        """Return the entry names of dirpath ([] if it doesn't exist)."""
+        with self._lock:
+            names = self._listings.get(dirpath)
+        if names is not None:
+            return names
+        self.scandir_calls += 1
+        instrument.count("scandir_calls")
+        try:
+            with os.scandir(dirpath) as it:
+                names = [entry.name for entry in it]
+        except OSError:
+            names = []
+        with self._lock:
+            self._listings[dirpath] = names
+        return names
+
+    def exists(self, path):
+        """Return True if path exists, using the cached listing of its parent."""
+        dirpath, name = os.path.split(path)
+        return name in self.listdir(dirpath)
+
+    def has_match(self, dirpath, regex):
+        """Return True if any entry of dirpath matches regex, stopping at the first."""
+        key = (dirpath, regex.pattern)
+        with self._lock:
+            names = self._listings.get(dirpath)
+            found = self._probes.get(key)
+        if found is not None:
+            return found
+        if names is not None:
+            found = any(regex.match(n) for n in names)
+        else:
+            self.scandir_calls += 1
+            instrument.count("scandir_calls")
+            found = False
+            try:
+                with os.scandir(dirpath) as it:
+                    found = any(regex.match(entry.name) for entry in it)
+            except OSError:
+                pass
+        with self._lock:
+            self._probes[key] = found
+        return found
+
+    def path_exists(self, path):
+        """Return True if path exists; frame tokens match any single frame."""
+        dirpath, name = os.path.split(path)
+        if FRAME_TOKEN.search(name):
+            return self.has_match(dirpath, _component_regex(name))
+        return self.exists(path)
+
+    def sequence_exists(self, path, frame_range=None):
+        """
+        Return True if path exists. A frame sequence needs its first and last
+        frame of frame_range, or any frame if frame_range is None.
+        """
+        if frame_range is None or not FRAME_TOKEN.search(os.path.basename(path)):
+            return self.path_exists(path)
+        first, last = frame_range
+        return self.exists(frame_path(path, first)) and self.exists(frame_path(path, last))
+
+    def latest_version(self, pattern_path, sentinel=str(SENTINEL_VERSION)):
+        """
+        Return (version, path) for the highest version of pattern_path present
+        on disk, or None. pattern_path is a path with sentinel in place of the
+        version number; frame tokens in it are kept in the returned path.
+        """
+        parts = pattern_path.split(os.sep)
+        idx = next((i for i, p in enumerate(parts) if sentinel in p), None)
+        if idx is None:
+            return None
+        parent = os.sep.join(parts[:idx]) or os.sep
+        regex = _component_regex(parts[idx], sentinel)
+        found = {}
+        for name in self.listdir(parent):
+            m = regex.match(name)
+            if m:
+                digits = m.group(1)
+                found.setdefault(int(digits), digits)
+        for version in sorted(found, reverse=True):
+            path = pattern_path.replace(sentinel, found[version])
+            if self._tail_exists(path.split(os.sep), idx):
+                return version, path
+        return None
+
+    def _tail_exists(self, parts, idx):
+        """Check that every component of parts from idx onward exists."""
+        for i in range(idx, len(parts)):
+            dirpath = os.sep.join(parts[:i]) or os.sep
+            if FRAME_TOKEN.search(parts[i]):
+                if not self.has_match(dirpath, _component_regex(parts[i])):
+                    return False
+            elif parts[i] not in self.listdir(dirpath):
+                return False
+        return True
+
+
+_index = DirectoryIndex()
+
+def get_index():
+    return _index
+
+def reset_index():
+    """Start a new run: forget every cached listing."""
+    global _index
+    _index = DirectoryIndex()
+    return _index
+
+
+def validate_paths(paths, frame_range=None, max_workers=VALIDATE_WORKERS, index=None):
+    """
+    Check every distinct path on a thread pool (see sequence_exists).
+    Returns a dict path → True / False.
+    """
+    index = index or _index
+    paths = list(dict.fromkeys(paths))
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(paths)))) as executor:
+        found = executor.map(lambda p: index.sequence_exists(p, frame_range), paths)
+        return dict(zip(paths, found))
+
+
+def abstract_fields(template, fields):
+    """Return a copy of fields with every abstract key (e.g. SEQ) set to its default."""
+    fields = dict(fields)
+    for key in template.keys.values():
+        if key.is_abstract:
+            fields[key.name] = key.default
+    return fields
+
+
+def latest_on_disk(template, fields, version_key, index=None):
+    """
+    Return the path of the highest version of template on disk (ignoring the
+    version in fields), or None. Any frame present counts; the returned path
+    keeps the frame field of the input, like the other filters do.
+    """
+    index = index or _index
+    pattern = abstract_fields(template, fields)
+    pattern[version_key] = SENTINEL_VERSION
+    hit = index.latest_version(template.apply_fields(pattern))
+    return template.apply_fields(dict(fields, **{version_key: hit[0]})) if hit else None
@@ -0,0 +1,115 @@
+"""
+Background watcher that keeps publish caches fresh from ShotGrid events.
+
+Instead of serving stale approvals or re-polling every PublishedFile, a
+PublishEventWatcher tails EventLogEntry records for PublishedFile creation
+and sg_status_list changes in the current project. For each batch of events
+it fetches the affected publishes once and invalidates only their entries in
+the ShotGunQuery cache (updating the persistent index when one is in use),
+then hands them to an optional on_change callback, e.g. to flag nodes whose
+resolved version is now out of date.
+
+The event source is pluggable: fetch_events(last_id) returns the events newer
+than last_id, so the watcher can be driven by a local fake stream.
+"""
+
+import threading
+import instrument
+import sg_client
+from instrument import log
+from shotgun_query_helper import ORIGINAL_FIELDS, _new_connection
+
+EVENT_TYPES = ["Shotgun_PublishedFile_New", "Shotgun_PublishedFile_Change"]
+WATCHED_ATTRIBUTES = ("sg_status_list", "version_number", "name")
+EVENT_FIELDS = ["id", "event_type", "attribute_name", "entity", "meta", "created_at"]
+PUBLISH_FIELDS = ORIGINAL_FIELDS + ["path", "updated_at"]
+
+# Max events pulled per poll
+EVENT_PAGE = 500
+
+
+class PublishEventWatcher(threading.Thread):
+    """
+    query         (ShotGunQuery): whose cache / index is kept up to date
+    sg            : ShotGrid connection owned by the watcher (a new one if None)
+    fetch_events  (callable): last_id → list of events; defaults to EventLogEntry
+    on_change     (callable): called with the list of changed publishes
+    interval      (float): seconds between polls
+    """
+    def __init__(self, query, sg=None, fetch_events=None, on_change=None, interval=15.0):
+        super(PublishEventWatcher, self).__init__(name="PublishEventWatcher", daemon=True)
+        self.query = query
+        self.sg = sg
+        self.fetch_events = fetch_events or self._fetch_event_log
+        self.on_change = on_change
+        self.interval = interval
+        self.last_id = None
+        self._stop_event = threading.Event()
+
+    def _shotgun(self):
+        if self.sg is None:
+            self.sg = _new_connection()
+        return sg_client.wrap(self.sg)
+
+    def _fetch_event_log(self, last_id):
+        instrument.count("sg_calls")
+        return self._shotgun().find(
+            "EventLogEntry",
+            [
+                ["id", "greater_than", last_id],
+                ["event_type", "in", EVENT_TYPES],
+                ["project", "is", self.query.project_entity],
+            ],
+            EVENT_FIELDS,
+            order=[{"field_name": "id", "direction": "asc"}],
+            limit=EVENT_PAGE
+        )
+
+    def _latest_event_id(self):
+        instrument.count("sg_calls")
+        last = self._shotgun().find_one(
+            "EventLogEntry", [], ["id"], order=[{"field_name": "id", "direction": "desc"}]
+        )
+        return last["id"] if last else 0
+
+    @staticmethod
+    def _is_relevant(event):
+        if event["event_type"] == "Shotgun_PublishedFile_New":
+            return True
+        return event.get("attribute_name") in WATCHED_ATTRIBUTES
+
+    def poll(self):
+        """Process every event since last_id. Returns the changed publishes."""
+        if self.last_id is None:
+            self.last_id = self._latest_event_id()
+            return []
+        events = self.fetch_events(self.last_id)
+        if not events:
+            return []
+        self.last_id = max(e["id"] for e in events)
+        ids = sorted({e["entity"]["id"] for e in events if e.get("entity") and self._is_relevant(e)})
+        if not ids:
+            return []
+        instrument.count("sg_calls")
+        pubs = self._shotgun().find("PublishedFile", [["id", "in", ids]], PUBLISH_FIELDS)
+        for pub in pubs:
+            if pub.get("entity"):
+                self.query.invalidate_publish(pub)
+        instrument.count("publish_events", len(events))
+        log.info(f"[events] {len(events)} event(s), {len(pubs)} publish(es) invalidated")
+        if pubs and self.on_change:
+            self.on_change(pubs)
+        return pubs
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                log.warning(f"[WARNING] Publish event poll failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def stop(self, wait=True):
+        self._stop_event.set()
+        if wait and self.is_alive():
+            self.join()
@@ -0,0 +1,21 @@
+"""
+Toolkit core hook: prefetch the new shot's publishes after a context change.
+
+Copy (or point the config's core hook) to config/core/hooks/context_change.py,
+with this repo on the Python path.
+"""
+
+from tank import get_hook_baseclass
+
+
+class ContextChange(get_hook_baseclass()):
+    def pre_context_change(self, current_context, next_context):
+        pass
+
+    def post_context_change(self, previous_context, current_context):
+        try:
+            import hou  # only inside Houdini sessions
+        except ImportError:
+            return
+        import prefetch
+        prefetch.on_context_change(previous_context, current_context)
@@ -0,0 +1,114 @@
+"""
+Structured timing, counters and leveled logging for the node path tools.
+
+Everything logs through the "update_nodes" logger: per-parm tracing is DEBUG,
+progress is INFO, and quiet mode only lets warnings and errors through.
+Each run collects per-stage timings (template, original_lookup,
+version_query, disk_scan, parm_set), counters (SG calls, cache hits, ...) and
+per-path totals, and can write them as a JSON summary to compare runs and
+find the slow nodes.
+
+Log level can also be set with UPDATE_NODES_LOG_LEVEL (e.g. DEBUG, WARNING).
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import contextlib
+
+log = logging.getLogger("update_nodes")
+if not log.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_handler)
+    log.propagate = False
+log.setLevel(os.environ.get("UPDATE_NODES_LOG_LEVEL", "INFO").upper())
+
+STAGES = ("template", "original_lookup", "version_query", "disk_scan", "change_check", "validate", "parm_set")
+
+# Number of slowest paths listed in the summary
+SLOWEST = 10
+
+
+def set_quiet(quiet=True):
+    """Only log warnings and errors (quiet) or go back to INFO."""
+    log.setLevel(logging.WARNING if quiet else logging.INFO)
+
+
+def set_verbose():
+    """Log the full per-parm trace."""
+    log.setLevel(logging.DEBUG)
+
+
+class RunStats:
+    """Thread-safe per-run stage timings, counters and per-item totals."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.stages = {}
+        self.counters = {}
+        self.items = {}
+
+    @contextlib.contextmanager
+    def stage(self, name, item=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                calls, total, worst = self.stages.get(name, (0, 0.0, 0.0))
+                self.stages[name] = (calls + 1, total + elapsed, max(worst, elapsed))
+                if item is not None:
+                    self.items[item] = self.items.get(item, 0.0) + elapsed
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        with self._lock:
+            slowest = sorted(self.items.items(), key=lambda kv: kv[1], reverse=True)[:SLOWEST]
+            return {
+                "started": self.started,
+                "wall": round(time.time() - self.started, 4),
+                "stages": {
+                    name: {"calls": c, "total": round(t, 4), "max": round(w, 4)}
+                    for name, (c, t, w) in self.stages.items()
+                },
+                "counters": dict(sorted(self.counters.items())),
+                "slowest": [{"item": item, "seconds": round(t, 4)} for item, t in slowest],
+            }
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def log_summary(self):
+        s = self.summary()
+        stages = ", ".join(f"{n} {v['total']:.3f}s/{v['calls']}" for n, v in s["stages"].items())
+        counters = ", ".join(f"{n}={v}" for n, v in s["counters"].items())
+        log.info(f">>> Run took {s['wall']:.3f}s — {stages or 'no stages'}")
+        if counters:
+            log.info(f">>> {counters}")
+
+
+_stats = RunStats()
+
+def stats():
+    return _stats
+
+def start_run():
+    """Begin a new run and return its RunStats."""
+    global _stats
+    _stats = RunStats()
+    return _stats
+
+def stage(name, item=None):
+    return _stats.stage(name, item)
+
+def count(name, n=1):
+    _stats.count(name, n)
@@ -0,0 +1,59 @@
+"""
+Resolution lockfile for deterministic farm renders.
+
+Written once when the artist submits (core.export_lockfile), a lockfile pins
+every path parm of the scene, by its unexpanded string, to the path it
+resolved to, along with the publish id and version it came from. Farm tasks apply it with
+core.apply_lockfile: no ShotGrid or Toolkit lookups, one dict lookup per parm,
+and every frame of a sequence resolves the same way even if an approval lands
+mid-render.
+"""
+
+import json
+import time
+
+# Bumped when the file layout changes
+LOCK_FORMAT = 2
+
+
+class Lockfile:
+    def __init__(self, entries=None, project=None, shot=None, version_filter=None, created_at=None):
+        # unexpanded parm string → [resolved path, publish id, version]
+        self.entries = entries or {}
+        self.project = project
+        self.shot = shot
+        self.version_filter = version_filter
+        self.created_at = created_at or time.time()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, original, path, publish_id=None, version=None):
+        self.entries[original] = [path, publish_id, version]
+
+    def resolve(self, original):
+        """Return the locked path for original, or None if it isn't locked."""
+        entry = self.entries.get(original)
+        return entry[0] if entry else None
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("format") != LOCK_FORMAT:
+            raise ValueError(f"{path}: unsupported lockfile format {data.get('format')}")
+        return cls(
+            data["entries"], data.get("project"), data.get("shot"),
+            data.get("version_filter"), data.get("created_at")
+        )
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({
+                "format": LOCK_FORMAT,
+                "project": self.project,
+                "shot": self.shot,
+                "version_filter": self.version_filter,
+                "created_at": self.created_at,
+                "entries": self.entries,
+            }, f, separators=(",", ":"))
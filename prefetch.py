@@ -0,0 +1,99 @@
+"""
+Background prefetch of the scene's publishes on scene load or context change.
+
+Nothing used to be fetched until the artist pressed Run. prefetch() reads the
+scene's path parms on the main thread, then resolves them once on a daemon
+thread with core.resolve_paths_batched (on a pooled ShotGrid connection).
+That warms the template cache and the session publish cache for the current
+shot, so the following update_all_node_paths() / dialog Run is served almost
+entirely from memory. Concurrent identical queries from a Run that starts
+meanwhile are coalesced by sg_client.
+
+Hooks:
+- install() registers a hou.hipFile event callback (call it from a Houdini
+  startup script, e.g. 456.py): prefetch after every scene load / merge
+- hooks/context_change.py is a Toolkit core hook calling on_context_change()
+  after every context switch
+"""
+
+import threading
+import core
+import toolkit_cache
+from instrument import log
+
+# Filter whose latest versions are prefetched
+PREFETCH_FILTER = "apr_ta"
+
+_thread = None
+_installed = False
+
+
+def _warm(query, pool, paths, version_filter):
+    try:
+        if pool is None:
+            core.resolve_paths_batched(paths, None, version_filter)
+            return
+        with pool.connection() as sg, query.use_connection(sg):
+            core.resolve_paths_batched(paths, None, version_filter)
+        log.info(f"[prefetch] Warmed {len(paths)} path(s) for filter '{version_filter}'")
+    except Exception as e:
+        log.warning(f"[WARNING] Prefetch failed: {e}")
+
+
+def prefetch(version_filter=PREFETCH_FILTER, wait=False):
+    """
+    Start warming the caches for the scene's current path parms. Must be
+    called on the main thread: parms are read and the session query (which
+    may need the engine) is created here. Returns the thread.
+    """
+    global _thread
+    paths = list(dict.fromkeys(snap.value for snap in core.collect_path_parms()))
+    if not paths:
+        return None
+    try:
+        query = core.get_query()
+    except Exception as e:
+        log.warning(f"[WARNING] Prefetch failed: {e}")
+        return None
+    pool = None if query.offline else core.get_connection_pool()
+    _thread = threading.Thread(
+        target=_warm, args=(query, pool, paths, version_filter), name="PublishPrefetch", daemon=True
+    )
+    _thread.start()
+    if wait:
+        _thread.join()
+    return _thread
+
+
+def wait(timeout=None):
+    """Block until the last prefetch finished (or timeout). Returns True when done."""
+    if _thread is None:
+        return True
+    _thread.join(timeout)
+    return not _thread.is_alive()
+
+
+def on_hip_event(event_type):
+    import hou
+    if event_type in (hou.hipFileEventType.AfterLoad, getattr(hou.hipFileEventType, "AfterMerge", None)):
+        prefetch()
+
+
+def on_context_change(previous_context, current_context):
+    """Prefetch for the new shot; a project switch also drops the session."""
+    previous_project = previous_context.project if previous_context else None
+    if previous_project != current_context.project:
+        core.reset_session()
+    elif previous_context and previous_context.entity == current_context.entity:
+        return
+    toolkit_cache.invalidate_if_config_changed()
+    prefetch()
+
+
+def install():
+    """Register the scene load callback (once per session)."""
+    import hou
+    global _installed
+    if not _installed:
+        hou.hipFile.addEventCallback(on_hip_event)
+        _installed = True
@@ -0,0 +1,209 @@
+"""
+Persistent per-project SQLite index of PublishedFile records.
+
+Each Houdini session used to start cold and ask ShotGrid again for every
+publish. A PublishIndex keeps (entity, name, type, version, status, path)
+rows on disk and answers the same lookups as ShotGunQuery locally. sync()
+only pulls the records updated since the last sync (less SYNC_OVERLAP), so
+after the first full pull a refresh costs one small query.
+
+Retired publishes are not returned by ShotGrid queries, so they stay in the
+index until rebuild() is called.
+"""
+
+import os
+import json
+import time
+import datetime
+import sqlite3
+import threading
+import instrument
+from instrument import log
+from shotgun_query_helper import ORIGINAL_FIELDS, PUBLISH_TYPE_FIELD, PublishResolver
+
+CACHE_DIR = os.environ.get(
+    "UPDATE_NODES_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "update_nodes")
+)
+
+SYNC_FIELDS = ORIGINAL_FIELDS + ["path", "updated_at"]
+
+# updated_at has one-second resolution, and a record committed in the same
+# second as the watermark (or slightly out of order) would be missed by a
+# strict greater_than. Each sync re-reads this window; rows are upserted, so
+# re-reading is harmless.
+SYNC_OVERLAP = datetime.timedelta(seconds=5)
+
+# Columns read back into PublishedFile dicts, see publish_from_row()
+PUBLISH_COLUMNS = "id, entity_type, entity_id, entity_name, name, type_code, version, status"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS publishes (
+    id          INTEGER PRIMARY KEY,
+    entity_type TEXT,
+    entity_id   INTEGER,
+    entity_name TEXT,
+    name        TEXT,
+    type_code   TEXT,
+    version     INTEGER,
+    status      TEXT,
+    path        TEXT,
+    updated_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS publishes_key
+    ON publishes (entity_type, entity_id, name, type_code);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _as_datetime(value):
+    if isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.fromisoformat(value)
+
+
+def publish_from_row(row):
+    """Turn a PUBLISH_COLUMNS row into a PublishedFile dict (ORIGINAL_FIELDS)."""
+    pub_id, ent_type, ent_id, ent_name, name, type_code, version, status = row
+    return {
+        "type": "PublishedFile",
+        "id": pub_id,
+        "entity": {"type": ent_type, "id": ent_id, "name": ent_name},
+        "name": name,
+        "version_number": version,
+        "sg_status_list": status,
+        PUBLISH_TYPE_FIELD: type_code,
+    }
+
+
+class PublishIndex(PublishResolver):
+    def __init__(self, project, db_path=None):
+        self.project = project
+        self.db_path = db_path or os.path.join(CACHE_DIR, f"publish_index_{project['id']}.sqlite")
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        # time.time() of the last sync() in this process, 0 if none yet
+        self.synced_at = 0.0
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._db:
+            self._db.executescript(SCHEMA)
+            # Lets the file be loaded as a manifest on its own (publish_table.load_manifest)
+            self._db.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES ('project', ?)", (json.dumps(project),)
+            )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    @property
+    def last_sync(self):
+        """updated_at of the newest record pulled so far, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM sync_state WHERE key = 'last_sync'").fetchone()
+        return _as_datetime(row[0]) if row else None
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM publishes").fetchone()[0]
+
+    def sync(self, sg):
+        """Pull publishes updated since the last sync. Returns the number pulled."""
+        filters = [["project", "is", self.project]]
+        last_sync = self.last_sync
+        if last_sync:
+            filters.append(["updated_at", "greater_than", last_sync - SYNC_OVERLAP])
+        instrument.count("sg_calls")
+        with instrument.stage("index_sync"):
+            pubs = sg.find("PublishedFile", filters, SYNC_FIELDS)
+        self._write(pubs, advance_sync=True)
+        self.synced_at = time.time()
+        log.info(f"[index] Synced {len(pubs)} publish(es) into {self.db_path}")
+        return len(pubs)
+
+    def upsert(self, pubs):
+        """
+        Insert or update publish records (as returned by sg.find with
+        SYNC_FIELDS). The sync watermark is left alone: only sync() knows
+        that every record up to a given updated_at has been pulled.
+        """
+        self._write(pubs, advance_sync=False)
+
+    def _write(self, pubs, advance_sync):
+        rows = []
+        newest = self.last_sync
+        for pub in pubs:
+            entity = pub.get("entity") or {}
+            path = pub.get("path") or {}
+            updated_at = pub.get("updated_at")
+            if updated_at and (newest is None or _as_datetime(updated_at) > newest):
+                newest = _as_datetime(updated_at)
+            rows.append((
+                pub["id"], entity.get("type"), entity.get("id"), entity.get("name"),
+                pub["name"], pub.get(PUBLISH_TYPE_FIELD), pub.get("version_number"),
+                pub.get("sg_status_list"), path.get("local_path"),
+                updated_at.isoformat() if isinstance(updated_at, datetime.datetime) else updated_at,
+            ))
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO publishes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            if advance_sync and newest:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sync_state VALUES ('last_sync', ?)", (newest.isoformat(),)
+                )
+
+    def delete(self, publish_ids):
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM publishes WHERE id = ?", [(i,) for i in publish_ids])
+
+    def rebuild(self, sg):
+        """Drop everything and pull the whole project again."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM publishes")
+            self._db.execute("DELETE FROM sync_state WHERE key = 'last_sync'")
+        return self.sync(sg)
+
+    def find_shots(self, codes):
+        codes = list(dict.fromkeys(codes))
+        if not codes:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT DISTINCT entity_id, entity_name FROM publishes WHERE entity_type = 'Shot' "
+                f"AND entity_name IN ({','.join('?' * len(codes))})",
+                codes
+            ).fetchall()
+        return {name: {"type": "Shot", "id": ent_id, "name": name} for ent_id, name in rows}
+
+    def find_originals(self, entity, names):
+        names = list(dict.fromkeys(names))
+        if not names:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {PUBLISH_COLUMNS} FROM publishes WHERE entity_type = ? AND entity_id = ? "
+                f"AND name IN ({','.join('?' * len(names))}) ORDER BY id",
+                [entity["type"], entity["id"]] + names
+            ).fetchall()
+        found = {}
+        for row in rows:
+            found.setdefault(row[4], publish_from_row(row))
+        return found
+
+    def latest_versions(self, keys, statuses=None):
+        found = {}
+        status_sql = f" AND status IN ({','.join('?' * len(statuses))})" if statuses else ""
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                row = self._db.execute(
+                    "SELECT MAX(version) FROM publishes WHERE entity_type = ? AND entity_id = ? "
+                    "AND name = ? AND type_code = ?" + status_sql,
+                    list(key) + list(statuses or [])
+                ).fetchone()
+                if row and row[0] is not None:
+                    found[key] = row[0]
+        return found
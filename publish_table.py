@@ -0,0 +1,108 @@
+"""
+Pre-fetched table of PublishedFile records.
+
+Fetched once from ShotGrid (e.g. by the batch updater) and saved as JSON, a
+PublishTable answers the same original-publish and latest-version lookups as
+ShotGunQuery from memory, so worker processes need no ShotGrid connection.
+load_manifest() also reads a PublishIndex SQLite file into a PublishTable.
+"""
+
+import os
+import json
+import time
+import sqlite3
+from shotgun_query_helper import ORIGINAL_FIELDS, PublishResolver, publish_key
+from publish_index import PUBLISH_COLUMNS, publish_from_row
+
+# Manifest file extensions read as PublishIndex SQLite files
+SQLITE_EXTENSIONS = (".sqlite", ".db")
+
+
+def load_manifest(path):
+    """Load a publish manifest (PublishTable JSON or PublishIndex SQLite) into memory."""
+    if os.path.splitext(path)[1].lower() in SQLITE_EXTENSIONS:
+        return PublishTable.load_index(path)
+    return PublishTable.load(path)
+
+
+class PublishTable(PublishResolver):
+    def __init__(self, project, publishes, fetched_at=None):
+        self.project = project
+        self.publishes = publishes
+        self.fetched_at = fetched_at or time.time()
+        self._by_name = {}
+        self._versions = {}
+        self._entities = {}
+        for pub in sorted(publishes, key=lambda p: p["id"]):
+            entity = pub["entity"]
+            self._entities.setdefault(entity.get("name"), entity)
+            self._by_name.setdefault((entity["type"], entity["id"], pub["name"]), pub)
+            self._versions.setdefault(publish_key(pub), []).append(
+                (pub["version_number"], pub.get("sg_status_list"))
+            )
+
+    @classmethod
+    def fetch(cls, sg, project, entities):
+        """Fetch every PublishedFile of project linked to one of entities."""
+        publishes = sg.find(
+            "PublishedFile",
+            [["project", "is", project], ["entity", "in", list(entities)]],
+            ORIGINAL_FIELDS
+        )
+        return cls(project, publishes)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["project"], data["publishes"], data.get("fetched_at"))
+
+    @classmethod
+    def load_index(cls, path):
+        """Read every publish of a PublishIndex SQLite file."""
+        db = sqlite3.connect(path)
+        try:
+            row = db.execute("SELECT value FROM sync_state WHERE key = 'project'").fetchone()
+            if not row:
+                raise ValueError(f"{path} has no project, not a publish index")
+            rows = db.execute(f"SELECT {PUBLISH_COLUMNS} FROM publishes").fetchall()
+        finally:
+            db.close()
+        return cls(json.loads(row[0]), [publish_from_row(r) for r in rows], os.path.getmtime(path))
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({
+                "project": self.project,
+                "fetched_at": self.fetched_at,
+                "publishes": self.publishes,
+            }, f)
+
+    def entity_by_name(self, name):
+        """Return the entity dict with the given name (e.g. shot code), or None."""
+        return self._entities.get(name)
+
+    def find_shots(self, codes):
+        return {
+            code: self._entities[code] for code in codes
+            if self._entities.get(code, {}).get("type") == "Shot"
+        }
+
+    def find_originals(self, entity, names):
+        found = {}
+        for name in names:
+            pub = self._by_name.get((entity["type"], entity["id"], name))
+            if pub:
+                found[name] = pub
+        return found
+
+    def latest_versions(self, keys, statuses=None):
+        found = {}
+        for key in keys:
+            versions = [
+                v for v, status in self._versions.get(key, [])
+                if not statuses or status in statuses
+            ]
+            if versions:
+                found[key] = max(versions)
+        return found
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# resolver_daemon.py
+"""
+Resident resolver service on a Unix socket.
+
+Every hython job or core.py call otherwise pays the Toolkit bootstrap, config
+load and ShotGrid login, then throws its caches away. The daemon keeps one
+session warm (Toolkit instances, template indexes, publish caches) and serves
+resolve requests from every process on the host over a JSON-lines protocol:
+one JSON object per line each way.
+
+Requests ("id" is echoed back):
+    {"op": "resolve", "project": 123, "paths": [...], "shot": "SH010", "filter": "apr_ta"}
+        → {"ok": true, "results": {path: resolved path or null}}
+    {"op": "rebuild", "project": 123, "paths": [...], "shots": [...], "filter": "apr_ta"}
+        → {"ok": true, "results": {path: {shot: path or null}}}
+    {"op": "refresh"}   drop cached publishes
+    {"op": "stats"}     run counters and timings since the daemon started
+    {"op": "ping"}
+    {"op": "shutdown"}
+Errors come back as {"ok": false, "error": "..."}. The socket is per user, not
+per project: resolve and rebuild must name the caller's project id and are
+refused when the daemon's session is for another project.
+
+core.resolve_paths(mode="daemon") goes through the daemon when one is
+listening and falls back to batched resolution otherwise.
+
+serve runs in the current Toolkit engine if there is one (e.g. started from
+tk-shell), otherwise it bootstraps a tk-shell engine for --project-id, from
+--config if given (a pipeline configuration path or descriptor URI) or the
+project's own configuration. With UPDATE_NODES_MANIFEST and UPDATE_NODES_SHOT
+set, no Toolkit is needed at all.
+
+Usage:
+    resolver_daemon.py serve [--socket PATH] [--project-id ID] [--config PATH|URI]
+    resolver_daemon.py resolve --project-id ID --shot SH010 [--socket PATH]
+                               [--filter apr_ta] <paths>...
+    resolver_daemon.py stop [--socket PATH]
+"""
+
+import os
+import sys
+import json
+import socket
+import argparse
+import threading
+import contextlib
+import socketserver
+
+SOCKET_PATH = os.environ.get(
+    "UPDATE_NODES_SOCKET",
+    os.path.join("/tmp", f"update_nodes_{os.getuid()}.sock")
+)
+# Seconds a client waits for the daemon to answer
+TIMEOUT = 120.0
+# Toolkit plugin id the daemon bootstraps its shell engine under
+PLUGIN_ID = "basic.shell"
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            request = {}
+            try:
+                request = json.loads(line)
+                response = self.server.dispatch(request)
+                response["ok"] = True
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            if isinstance(request, dict) and "id" in request:
+                response["id"] = request["id"]
+            self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+            self.wfile.flush()
+            if response["ok"] and request.get("op") == "shutdown":
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+class ResolverServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path=SOCKET_PATH):
+        if os.path.exists(socket_path):
+            if ResolverClient(socket_path).available():
+                raise RuntimeError(f"A resolver daemon is already listening on {socket_path}")
+            os.unlink(socket_path)  # stale socket of a dead daemon
+        # Socket is created owner-only: no window between bind() and a chmod
+        umask = os.umask(0o177)
+        try:
+            super(ResolverServer, self).__init__(socket_path, _Handler)
+        finally:
+            os.umask(umask)
+        self.socket_path = socket_path
+        import core
+        import instrument
+        self.core = core
+        self.instrument = instrument
+        instrument.start_run()
+
+    @contextlib.contextmanager
+    def _session(self):
+        """Run the block on a pooled connection of the warm session query."""
+        query = self.core.get_query()
+        if query.offline:
+            yield query
+            return
+        with self.core.get_connection_pool().connection() as sg, query.use_connection(sg):
+            yield query
+
+    def dispatch(self, request):
+        op = request.get("op")
+        core = self.core
+        if op == "ping":
+            return {"pid": os.getpid()}
+        if op == "shutdown":
+            return {}
+        if op == "refresh":
+            core.refresh_publish_cache()
+            return {}
+        if op == "stats":
+            return {"run": self.instrument.stats().summary()}
+        if op in ("resolve", "rebuild"):
+            # Warm caches are kept; disk listings, the config and (when due)
+            # the publish index are re-checked
+            core.toolkit_cache.invalidate_if_config_changed()
+            core.disk_scan.reset_index()
+            version_filter = request.get("filter", "apr_ta")
+            with self._session() as query:
+                project = query.project_entity
+                if request.get("project") != project["id"]:
+                    raise ValueError(
+                        f"daemon serves project {project.get('name')} (id {project['id']}), "
+                        f"not project id {request.get('project')}"
+                    )
+                query.sync_index()
+                if op == "resolve":
+                    # Publishes are looked up on the caller's shot, not the daemon's context
+                    shot = request.get("shot")
+                    if not shot:
+                        raise ValueError("resolve needs the caller's shot")
+                    entity = query.find_shots([shot]).get(shot)
+                    if not entity:
+                        raise ValueError(f"Shot '{shot}' not found")
+                    results = core.resolve_paths_batched(
+                        request["paths"], shot, version_filter, entity=entity
+                    )
+                else:
+                    results = core.rebuild_paths_for_shots(request["paths"], request["shots"], version_filter)
+            return {"results": results}
+        raise ValueError(f"unknown op {op!r}")
+
+    def server_close(self):
+        super(ResolverServer, self).server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class ResolverClient:
+    """JSON-lines client of the resolver daemon; one connection per call."""
+    def __init__(self, socket_path=SOCKET_PATH, timeout=TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def request(self, op, **params):
+        params["op"] = op
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            sock.sendall((json.dumps(params) + "\n").encode("utf-8"))
+            with sock.makefile("rb") as f:
+                line = f.readline()
+        if not line:
+            raise ConnectionError("resolver daemon closed the connection")
+        response = json.loads(line)
+        if not response.pop("ok", False):
+            raise RuntimeError(f"resolver daemon: {response.get('error')}")
+        return response
+
+    def available(self):
+        try:
+            self.request("ping")
+            return True
+        except (OSError, ValueError, RuntimeError):
+            return False
+
+    def resolve(self, project_id, paths, shot, version_filter="apr_ta"):
+        return self.request(
+            "resolve", project=project_id, paths=list(paths), shot=shot, filter=version_filter
+        )["results"]
+
+    def rebuild(self, project_id, paths, shots, version_filter="apr_ta"):
+        return self.request(
+            "rebuild", project=project_id, paths=list(paths), shots=list(shots), filter=version_filter
+        )["results"]
+
+
+def start_toolkit(project_id=None, config=None):
+    """
+    Return the running Toolkit engine, or bootstrap a tk-shell engine for
+    project_id (from config, a pipeline configuration path or descriptor URI,
+    if given) with the saved ShotGrid login.
+    """
+    import sgtk
+    engine = sgtk.platform.current_engine()
+    if engine:
+        if project_id is not None and engine.context.project["id"] != project_id:
+            raise RuntimeError(
+                f"Running engine is for project id {engine.context.project['id']}, not {project_id}"
+            )
+        return engine
+    if project_id is None:
+        raise RuntimeError(
+            "No Toolkit engine running: pass --project-id (and --config) so the daemon can start one"
+        )
+    user = sgtk.authentication.ShotgunAuthenticator().get_user()
+    sgtk.set_authenticated_user(user)
+    manager = sgtk.bootstrap.ToolkitManager(sg_user=user)
+    manager.plugin_id = PLUGIN_ID
+    if config:
+        manager.base_configuration = {"type": "path", "path": config} if os.path.isdir(config) else config
+    return manager.bootstrap_engine("tk-shell", entity={"type": "Project", "id": project_id})
+
+
+def serve(socket_path=SOCKET_PATH, project_id=None, config=None):
+    """Start Toolkit (see start_toolkit), warm the session and serve until stopped."""
+    import core
+    try:
+        if not (core.MANIFEST_PATH and core.MANIFEST_SHOT):
+            start_toolkit(project_id, config)
+        core.get_query()
+    except Exception as e:
+        core.log.error(f"[ERROR] Resolver daemon can't start a session: {e}")
+        return 1
+    server = ResolverServer(socket_path)
+    server.core.log.info(f">>> Resolver daemon listening on {socket_path} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Resident path resolver on a Unix socket.")
+    parser.add_argument("command", choices=["serve", "resolve", "stop"])
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    parser.add_argument("--shot")
+    parser.add_argument("--project-id", type=int,
+                        help="project the paths belong to (resolve), or to start Toolkit for (serve)")
+    parser.add_argument("--config", help="pipeline configuration path or descriptor URI (serve)")
+    parser.add_argument("--filter", default="apr_ta", choices=["all", "apr", "ta", "apr_ta"])
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    if args.command == "serve":
+        sys.exit(serve(args.socket, args.project_id, args.config))
+    client = ResolverClient(args.socket)
+    if args.command == "stop":
+        client.request("shutdown")
+        sys.exit(0)
+    if args.project_id is None or not args.shot:
+        print("[ERROR] resolve needs --project-id and --shot")
+        sys.exit(1)
+    results = client.resolve(args.project_id, args.paths, args.shot, args.filter)
+    for path, resolved in results.items():
+        print(f"{path} → {resolved}")
+    sys.exit(0 if all(results.values()) else 2)
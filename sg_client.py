@@ -0,0 +1,193 @@
+"""
+Thin client layer over ShotGrid API connections.
+
+wrap(sg) returns a ShotgunClient proxying find / find_one / summarize on sg
+with three process-wide protections:
+- singleflight: concurrent identical read queries (same method and
+  arguments) from any thread or connection share one request; the callers
+  get the same result objects and must treat them as read-only
+- adaptive token bucket: requests are paced to UPDATE_NODES_SG_RATE per
+  second (bursts of UPDATE_NODES_SG_BURST, 0 disables the limit); the rate
+  halves when a request fails transiently and creeps back up as requests
+  succeed
+- retry: transient errors (network errors, API protocol errors such as the
+  site's rate limit) are retried up to RETRIES times with jittered
+  exponential backoff
+Every other attribute is passed through to the wrapped connection.
+"""
+
+import os
+import time
+import random
+import threading
+import weakref
+import instrument
+from instrument import log
+
+RATE = float(os.environ.get("UPDATE_NODES_SG_RATE", "50"))
+BURST = int(os.environ.get("UPDATE_NODES_SG_BURST", "100"))
+MIN_RATE = 1.0
+RETRIES = 4
+BACKOFF = 0.5       # seconds before the first retry, doubled each attempt
+MAX_BACKOFF = 8.0
+
+COALESCED_METHODS = ("find", "find_one", "summarize")
+
+
+class TokenBucket:
+    """
+    Token bucket allowing rate requests per second on average and bursts of
+    up to burst. penalize() halves the rate (down to min_rate), reward()
+    raises it back towards max_rate a little at a time.
+    """
+    def __init__(self, rate=RATE, burst=BURST, min_rate=MIN_RATE):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = burst
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns the wait."""
+        if not self.max_rate:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def penalize(self):
+        if not self.max_rate:
+            return
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 1.0)
+
+    def reward(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class SingleFlight:
+    """Run fn once per key at a time; concurrent callers with the key share its result."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event()}
+        if not leader:
+            instrument.count("sg_coalesced")
+            call["done"].wait()
+            if "error" in call:
+                raise call["error"]
+            return call["result"]
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+
+_bucket = TokenBucket()
+_flight = SingleFlight()
+_clients = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+_transient_errors = None
+
+
+def transient_errors():
+    """Exception types worth retrying (the API's ProtocolError loaded on first use)."""
+    global _transient_errors
+    if _transient_errors is None:
+        try:
+            from tank_vendor.shotgun_api3 import ProtocolError
+            _transient_errors = (OSError, ProtocolError)
+        except ImportError:
+            _transient_errors = (OSError,)
+    return _transient_errors
+
+
+def _backoff(attempt):
+    """Full-jitter exponential backoff for the given retry attempt (1-based)."""
+    return random.uniform(0, min(MAX_BACKOFF, BACKOFF * 2 ** (attempt - 1)))
+
+
+def call(fn, *args, **kwargs):
+    """Call fn rate-limited, retrying transient errors with jittered backoff."""
+    attempt = 0
+    while True:
+        waited = _bucket.acquire()
+        if waited:
+            instrument.count("sg_throttled")
+        try:
+            result = fn(*args, **kwargs)
+        except transient_errors() as e:
+            _bucket.penalize()
+            attempt += 1
+            if attempt > RETRIES:
+                raise
+            delay = _backoff(attempt)
+            instrument.count("sg_retries")
+            log.warning(f"[WARNING] ShotGrid call failed ({e}), retry {attempt}/{RETRIES} in {delay:.2f}s")
+            time.sleep(delay)
+            continue
+        _bucket.reward()
+        return result
+
+
+class ShotgunClient:
+    def __init__(self, sg):
+        self.sg = sg
+
+    def _read(self, method, *args, **kwargs):
+        key = (method, repr(args), repr(sorted(kwargs.items())))
+        return _flight.do(key, lambda: call(getattr(self.sg, method), *args, **kwargs))
+
+    def find(self, *args, **kwargs):
+        return self._read("find", *args, **kwargs)
+
+    def find_one(self, *args, **kwargs):
+        return self._read("find_one", *args, **kwargs)
+
+    def summarize(self, *args, **kwargs):
+        return self._read("summarize", *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.sg, name)
+
+
+def wrap(sg):
+    """Return the ShotgunClient for connection sg (sg itself if already wrapped)."""
+    if sg is None or isinstance(sg, ShotgunClient):
+        return sg
+    with _clients_lock:
+        client = _clients.get(sg)
+        if client is None:
+            client = _clients[sg] = ShotgunClient(sg)
+    return client
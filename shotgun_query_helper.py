@@ -1,38 +1,497 @@
 import re
-import sgtk
+import time
+import threading
+import contextlib
+import queue
+from collections import OrderedDict
 import os
+import toolkit_cache
+import disk_scan
+import instrument
+import sg_client
 
 PUBLISH_STATUSES = ["ta", "apr"]
 
+# version_filter → allowed sg_status_list values (None means any status)
+FILTER_STATUSES = {
+    "all": None,
+    "apr": ["apr"],
+    "ta": ["ta"],
+    "apr_ta": ["apr", "ta"],
+}
+
+PUBLISH_TYPE_FIELD = "published_file_type.PublishedFileType.code"
+ORIGINAL_FIELDS = ["id", "entity", "name", "version_number", "sg_status_list", PUBLISH_TYPE_FIELD]
+
+# Max number of names / (entity, name, type) groups sent in one batched query
+BATCH_SIZE = 100
+
+# summarize() request answering both the original and the latest-version
+# lookups: lowest id and highest version per name / type / status
+SUMMARY_FIELDS = [
+    {"field": "id", "type": "minimum"},
+    {"field": "version_number", "type": "maximum"},
+]
+SUMMARY_GROUPING = [
+    {"field": "name", "type": "exact", "direction": "asc"},
+    {"field": PUBLISH_TYPE_FIELD, "type": "exact", "direction": "asc"},
+    {"field": "sg_status_list", "type": "exact", "direction": "asc"},
+]
+
+_MISSING = object()
+
+
+def status_filter(statuses):
+    """Return the sg_status_list filter for a list of statuses, or None."""
+    if not statuses:
+        return None
+    if len(statuses) == 1:
+        return ["sg_status_list", "is", statuses[0]]
+    return ["sg_status_list", "in", list(statuses)]
+
+
+def publish_key(pub):
+    """Return the (entity type, entity id, name, publish type) key of a publish."""
+    return (pub["entity"]["type"], pub["entity"]["id"], pub["name"], pub[PUBLISH_TYPE_FIELD])
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire ttl seconds after being stored.
+    get() returns default for missing or expired keys; None is a valid value.
+    """
+    def __init__(self, ttl=300, max_size=4096, name="cache"):
+        self.ttl = ttl
+        self.name = name
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING and time.time() - item[0] < self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                instrument.count(f"{self.name}_hits")
+                return item[1]
+            if item is not _MISSING:
+                del self._data[key]
+            self.misses += 1
+            instrument.count(f"{self.name}_misses")
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def pop_prefix(self, prefix):
+        """Drop every tuple key starting with the items of prefix."""
+        with self._lock:
+            for key in [k for k in self._data if k[:len(prefix)] == prefix]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        """True if key holds an unexpired entry (not counted as a hit or miss)."""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            return item is not _MISSING and time.time() - item[0] < self.ttl
+
+
+def _new_connection():
+    """Create a fresh ShotGrid connection for the authenticated Toolkit user."""
+    import sgtk
+    user = sgtk.get_authenticated_user()
+    if user:
+        return user.create_sg_connection()
+    return sgtk.util.shotgun.create_sg_connection()
+
+
+class ShotgunConnectionPool:
+    """
+    Small pool of ShotGrid connections for worker threads. The Python API
+    connection is not thread-safe, so each connection is only ever used by
+    one thread at a time. Connections are created lazily, up to size.
+    """
+    def __init__(self, size=8, factory=_new_connection):
+        self.size = size
+        self.factory = factory
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def connection(self):
+        try:
+            sg = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    sg = self.factory()
+                except Exception:
+                    # Free the slot, or later borrows wait forever on _idle
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                sg = self._idle.get()
+        try:
+            yield sg
+        finally:
+            self._idle.put(sg)
+
+
+class PublishResolver:
+    """
+    Backend answering the publish lookups of ShotGunQuery. The live ShotGrid
+    connection is one backend (ShotgunResolver); PublishTable and PublishIndex
+    answer the same calls from a local manifest, so switching backends needs
+    no change at the call sites. Remote backends are cached by ShotGunQuery.
+    """
+    remote = False
+    project = None
+
+    def find_shots(self, codes):
+        """Return a dict code → Shot entity (type, id, name) for every code found."""
+        raise NotImplementedError
+
+    def find_originals(self, entity, names):
+        """Return a dict name → PublishedFile (ORIGINAL_FIELDS) on entity."""
+        raise NotImplementedError
+
+    def latest_versions(self, keys, statuses=None):
+        """Return a dict publish_key → highest version_number with one of statuses."""
+        raise NotImplementedError
+
+    def changed_publishes(self, entity, names, since):
+        """
+        Return the publishes named names on entity updated after since (a
+        datetime), or None if this backend can't tell what changed.
+        """
+        return None
+
+    def find_latest(self, entity, names, statuses=None):
+        """
+        Return (originals, latest) for names on entity: originals maps name →
+        original publish, latest maps publish_key → highest version with one
+        of statuses. Original publishes may come back without their
+        version_number (None); find_originals() has the full record.
+        """
+        originals = self.find_originals(entity, names)
+        return originals, self.latest_versions([publish_key(p) for p in originals.values()], statuses)
+
+    def publish_matrix(self, entities, names, statuses=None):
+        """
+        Return (originals, latest) for names on every entity: originals maps
+        (entity type, entity id, name) → publish, latest maps publish_key →
+        highest version with one of statuses.
+        """
+        originals = {}
+        for entity in entities:
+            for name, pub in self.find_originals(entity, names).items():
+                originals[(entity["type"], entity["id"], name)] = pub
+        latest = self.latest_versions([publish_key(p) for p in originals.values()], statuses)
+        return originals, latest
+
+
+class ShotgunResolver(PublishResolver):
+    """Live ShotGrid backend, querying through the connection of query."""
+    remote = True
+
+    def __init__(self, query):
+        self.query = query
+
+    @property
+    def project(self):
+        return self.query.project_entity
+
+    def find_shots(self, codes):
+        instrument.count("sg_calls")
+        return {
+            s["code"]: {"type": "Shot", "id": s["id"], "name": s["code"]}
+            for s in self.query.shotgun.find(
+                "Shot", [["project", "is", self.project], ["code", "in", list(codes)]], ["code"]
+            )
+        }
+
+    def find_originals(self, entity, names):
+        found = {}
+        sg = self.query.shotgun
+        for chunk in _chunks(list(names), BATCH_SIZE):
+            name_filter = ["name", "is", chunk[0]] if len(chunk) == 1 else ["name", "in", chunk]
+            instrument.count("sg_calls")
+            for pub in sg.find(
+                "PublishedFile",
+                [["project", "is", self.project], ["entity", "is", entity], name_filter],
+                ORIGINAL_FIELDS
+            ):
+                found.setdefault(pub["name"], pub)
+        return found
+
+    def latest_versions(self, keys, statuses=None):
+        found = {}
+        sg = self.query.shotgun
+        for chunk in _chunks(list(keys), BATCH_SIZE):
+            groups = [
+                {
+                    "filter_operator": "all",
+                    "filters": [
+                        ["entity", "is", {"type": ent_type, "id": ent_id}],
+                        ["name", "is", name],
+                        [PUBLISH_TYPE_FIELD, "is", pub_type]
+                    ]
+                }
+                for ent_type, ent_id, name, pub_type in chunk
+            ]
+            filters = [["project", "is", self.project]]
+            if len(groups) == 1:
+                filters.extend(groups[0]["filters"])
+            else:
+                filters.append({"filter_operator": "any", "filters": groups})
+            if status_filter(statuses):
+                filters.append(status_filter(statuses))
+            instrument.count("sg_calls")
+            for pub in sg.find(
+                "PublishedFile", filters,
+                ["entity", "name", "version_number", PUBLISH_TYPE_FIELD]
+            ):
+                key = publish_key(pub)
+                if pub["version_number"] > found.get(key, -1):
+                    found[key] = pub["version_number"]
+        return found
+
+    def changed_publishes(self, entity, names, since):
+        found = []
+        for chunk in _chunks(list(names), BATCH_SIZE):
+            instrument.count("sg_calls")
+            found.extend(self.query.shotgun.find(
+                "PublishedFile",
+                [
+                    ["project", "is", self.project],
+                    ["entity", "is", entity],
+                    ["name", "in", chunk],
+                    ["updated_at", "greater_than", since],
+                ],
+                ORIGINAL_FIELDS
+            ))
+        return found
+
+    def find_latest(self, entity, names, statuses=None):
+        """
+        One summarize() per BATCH_SIZE names: the lowest publish id and the
+        highest version of every name / type / status, instead of the
+        original records followed by every version of each publish.
+        """
+        originals = {}
+        latest = {}
+        sg = self.query.shotgun
+        for chunk in _chunks(list(names), BATCH_SIZE):
+            instrument.count("sg_calls")
+            summary = sg.summarize(
+                "PublishedFile",
+                [
+                    ["project", "is", self.project],
+                    ["entity", "is", entity],
+                    ["name", "in", chunk],
+                ],
+                SUMMARY_FIELDS,
+                grouping=SUMMARY_GROUPING
+            )
+            for name_group in summary.get("groups") or []:
+                name = name_group["group_value"]
+                for type_group in name_group.get("groups") or []:
+                    pub_type = type_group["group_value"]
+                    key = (entity["type"], entity["id"], name, pub_type)
+                    for status_group in type_group.get("groups") or []:
+                        values = status_group["summaries"]
+                        pub_id = values["id"]
+                        if pub_id is not None and pub_id < originals.get(name, {}).get("id", pub_id + 1):
+                            originals[name] = {
+                                "type": "PublishedFile",
+                                "id": pub_id,
+                                "entity": entity,
+                                "name": name,
+                                "version_number": None,
+                                "sg_status_list": None,
+                                PUBLISH_TYPE_FIELD: pub_type,
+                            }
+                        if statuses and status_group["group_value"] not in statuses:
+                            continue
+                        if values["version_number"] is not None:
+                            latest[key] = max(latest.get(key, -1), values["version_number"])
+        # Only the original's own publish type counts, as with latest_versions()
+        keys = {publish_key(pub) for pub in originals.values()}
+        return originals, {k: v for k, v in latest.items() if k in keys}
+
+    def publish_matrix(self, entities, names, statuses=None):
+        """One 'entity in' query per BATCH_SIZE names instead of two per entity."""
+        originals = {}
+        latest = {}
+        for chunk in _chunks(list(names), BATCH_SIZE):
+            instrument.count("sg_calls")
+            for pub in sorted(self.query.shotgun.find(
+                "PublishedFile",
+                [
+                    ["project", "is", self.project],
+                    ["entity", "in", list(entities)],
+                    ["name", "in", chunk],
+                ],
+                ORIGINAL_FIELDS
+            ), key=lambda p: p["id"]):
+                originals.setdefault((pub["entity"]["type"], pub["entity"]["id"], pub["name"]), pub)
+                if statuses and pub["sg_status_list"] not in statuses:
+                    continue
+                key = publish_key(pub)
+                if pub["version_number"] > latest.get(key, -1):
+                    latest[key] = pub["version_number"]
+        return originals, latest
+
+
 class ShotGunQuery:
-    def __init__(self, loader_name="tk-multi-loader2"):
+    def __init__(self, loader_name="tk-multi-loader2", cache_ttl=300, cache_size=4096):
         self.loader_name = loader_name
         self.engine = None
         self.loader_app = None
         self.project = None
+        self.project_entity = None
         self.shot = None
+        # Backend answering publish lookups, see use_resolver()
+        self.resolver = ShotgunResolver(self)
+        # Session cache for original publishes and latest versions
+        self.cache = TTLCache(cache_ttl, cache_size, name="publish_cache")
+        # Per-thread connection override, see use_connection()
+        self._local = threading.local()
 
     def set_shotgun(self, shot_context=True):
         """Initialize Toolkit engine, project and shot context"""
+        import sgtk
         self.engine = sgtk.platform.current_engine()
         self.project = self.engine.context.project['name']
+        self.project_entity = self.engine.context.project
         if shot_context:
             self.shot = self.engine.context.entity
             self.loader_app = self.engine.apps.get(self.loader_name)
 
+    @property
+    def shotgun(self):
+        """
+        The calling thread's connection, or the engine's main connection,
+        behind the coalescing / rate-limiting sg_client layer.
+        """
+        return sg_client.wrap(getattr(self._local, "sg", None) or self.engine.shotgun)
+
+    @property
+    def offline(self):
+        """True when lookups are answered locally, with no ShotGrid round trip."""
+        return not self.resolver.remote
+
+    @contextlib.contextmanager
+    def use_connection(self, sg):
+        """Route this thread's queries through sg (e.g. from a connection pool)."""
+        previous = getattr(self._local, "sg", None)
+        self._local.sg = sg
+        try:
+            yield self
+        finally:
+            self._local.sg = previous
+
+    def use_resolver(self, resolver):
+        """
+        Answer publish lookups from resolver (a PublishResolver, e.g. a
+        PublishTable or PublishIndex), or from live ShotGrid if None.
+        """
+        self.resolver = resolver or ShotgunResolver(self)
+        if resolver is not None and resolver.project:
+            self.project_entity = resolver.project
+            self.project = resolver.project.get("name")
+
+    def use_index(self, index, sync=True):
+        """
+        Answer publish lookups from a persistent PublishIndex, pulling the
+        publishes updated since its last sync first.
+        """
+        if sync:
+            index.sync(self.shotgun)
+        self.use_resolver(index)
+
+    def refresh(self):
+        """
+        Drop every cached publish so the next lookups hit ShotGrid again;
+        a persistent index is brought up to date instead.
+        """
+        self.cache.clear()
+        if hasattr(self.resolver, "sync"):
+            self.resolver.sync(self.shotgun)
+
+    def sync_index(self):
+        """
+        Bring a persistent index up to date when its last sync is older than
+        the cache TTL: lookups served from the index bypass the TTL cache, so
+        this keeps them as fresh as live ones. Returns True if it synced.
+        """
+        if not hasattr(self.resolver, "sync") or time.time() - self.resolver.synced_at < self.cache.ttl:
+            return False
+        self.resolver.sync(self.shotgun)
+        return True
+
+    def invalidate_publish(self, pub):
+        """
+        Drop the cached lookups a new or changed publish can affect (its
+        original and its latest version under every filter), and update the
+        persistent index if one is in use. pub needs ORIGINAL_FIELDS.
+        query_latest() takes raw filters, so which of its entries pub affects
+        can't be told: all of them are dropped.
+        """
+        key = publish_key(pub)
+        project = self._project_key()
+        self.cache.pop(("original", project, key[0], key[1], key[2]))
+        for statuses in FILTER_STATUSES.values():
+            status_key = tuple(sorted(statuses)) if statuses else None
+            self.cache.pop(("latest", project, key, status_key))
+            self.cache.pop(("summary", project, key[0], key[1], key[2], status_key))
+        self.cache.pop_prefix(("query_latest",))
+        if hasattr(self.resolver, "upsert"):
+            self.resolver.upsert([pub])
+
     def build_path_from_template(self, template_path, **custom_fields):
         """
         Build a new path from a file-system template path and field overrides.
         Returns the first matching filesystem path.
         """
-        # Infer Toolkit instance from the path
-        tk = sgtk.sgtk_from_path(template_path)
-        templates = tk.templates_from_path(template_path)
-        if not templates:
+        # Infer Toolkit instance and template from the path (cached)
+        tk, template, fields = toolkit_cache.template_from_path(template_path)
+        if not template:
             return None
-        template = templates[0]
-        fields = template.get_fields(template_path)
         fields.update(custom_fields)
+        if not template.missing_keys(fields, skip_defaults=True):
+            # Fully specified: one cached existence check instead of a walk
+            path = template.apply_fields(fields)
+            return path if disk_scan.get_index().path_exists(path) else None
         paths = tk.paths_from_template(template, fields)
         return paths[0] if paths else None
 
@@ -52,11 +511,162 @@ class ShotGunQuery:
     def query_latest(self, filters, order):
         """
         Query ShotGrid for the latest PublishedFile matching filters and order.
+        Takes raw ShotGrid filters, so it always needs a live connection.
         """
-        sg = self.engine.shotgun
-        return sg.find_one(
+        key = ("query_latest", repr(filters), repr(order))
+        pub = self.cache.get(key)
+        if pub is not _MISSING:
+            return pub
+        sg = self.shotgun
+        instrument.count("sg_calls")
+        pub = sg.find_one(
             "PublishedFile",
             filters,
             ["path", "version_number"],
             order=order
         )
+        self.cache.set(key, pub)
+        return pub
+
+    def _project_key(self):
+        return self.project_entity["id"]
+
+    def find_original(self, entity, name):
+        """
+        Return the PublishedFile named name on entity (ORIGINAL_FIELDS), or None.
+        """
+        return self.find_originals(entity, [name]).get(name)
+
+    def find_originals(self, entity, names):
+        """
+        Return a dict name → PublishedFile on entity for every name found,
+        querying ShotGrid only for names not already cached.
+        """
+        if self.offline:
+            return self.resolver.find_originals(entity, names)
+        found = {}
+        missing = []
+        for name in dict.fromkeys(names):
+            pub = self.cache.get(("original", self._project_key(), entity["type"], entity["id"], name))
+            if pub is _MISSING:
+                missing.append(name)
+            elif pub:
+                found[name] = pub
+        if missing:
+            pubs = self.resolver.find_originals(entity, missing)
+            for name in missing:
+                self.cache.set(("original", self._project_key(), entity["type"], entity["id"], name), pubs.get(name))
+            found.update(pubs)
+        return found
+
+    def find_shots(self, codes):
+        """Return a dict code → Shot entity (type, id, name) for every code found."""
+        if self.offline:
+            return self.resolver.find_shots(codes)
+        found = {}
+        missing = []
+        for code in dict.fromkeys(codes):
+            shot = self.cache.get(("shot", self._project_key(), code))
+            if shot is _MISSING:
+                missing.append(code)
+            elif shot:
+                found[code] = shot
+        if missing:
+            shots = self.resolver.find_shots(missing)
+            for code in missing:
+                self.cache.set(("shot", self._project_key(), code), shots.get(code))
+            found.update(shots)
+        return found
+
+    def publish_matrix(self, entities, names, statuses=None):
+        """
+        Return (originals, latest) for names on all entities (see
+        PublishResolver.publish_matrix). Results from ShotGrid are also stored
+        in the session cache for later single lookups.
+        """
+        names = list(dict.fromkeys(names))
+        originals, latest = self.resolver.publish_matrix(entities, names, statuses)
+        if self.offline:
+            return originals, latest
+        status_key = tuple(sorted(statuses)) if statuses else None
+        project = self._project_key()
+        for entity in entities:
+            for name in names:
+                self.cache.set(("original", project, entity["type"], entity["id"], name),
+                               originals.get((entity["type"], entity["id"], name)))
+        for pub in originals.values():
+            key = publish_key(pub)
+            self.cache.set(("latest", project, key, status_key), latest.get(key))
+        return originals, latest
+
+    def changed_publishes(self, entity, names, since):
+        """
+        Return the publishes named names on entity updated after since, never
+        from the cache; None if the backend can't tell (re-resolve them all).
+        """
+        return self.resolver.changed_publishes(entity, names, since)
+
+    def find_latest(self, entity, names, statuses=None):
+        """
+        Return (originals, latest) for names on entity in one round trip (see
+        PublishResolver.find_latest), querying only names not already cached.
+        Original publishes may lack their version_number (None).
+        """
+        if self.offline:
+            return self.resolver.find_latest(entity, names, statuses)
+        status_key = tuple(sorted(statuses)) if statuses else None
+        originals = {}
+        latest = {}
+        missing = []
+        for name in dict.fromkeys(names):
+            hit = self.cache.get(("summary", self._project_key(), entity["type"], entity["id"], name, status_key))
+            if hit is _MISSING:
+                missing.append(name)
+            elif hit:
+                pub, version = hit
+                originals[name] = pub
+                if version is not None:
+                    latest[publish_key(pub)] = version
+        if missing:
+            pubs, versions = self.resolver.find_latest(entity, missing, statuses)
+            for name in missing:
+                pub = pubs.get(name)
+                self.cache.set(
+                    ("summary", self._project_key(), entity["type"], entity["id"], name, status_key),
+                    (pub, versions.get(publish_key(pub))) if pub else None
+                )
+            originals.update(pubs)
+            latest.update(versions)
+        return originals, latest
+
+    def latest_version(self, entity, name, published_file_type, statuses=None):
+        """
+        Return the highest version_number published for (entity, name, type)
+        with one of statuses (any status if None), or None if there is none.
+        """
+        key = (entity["type"], entity["id"], name, published_file_type)
+        return self.latest_versions([key], statuses).get(key)
+
+    def latest_versions(self, keys, statuses=None):
+        """
+        Return a dict (entity type, entity id, name, type) → highest
+        version_number for every key with a matching publish. Cached keys are
+        served from memory; the rest are fetched with grouped 'any' queries.
+        """
+        if self.offline:
+            return self.resolver.latest_versions(keys, statuses)
+        status_key = tuple(sorted(statuses)) if statuses else None
+        found = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            version = self.cache.get(("latest", self._project_key(), key, status_key))
+            if version is _MISSING:
+                missing.append(key)
+            elif version is not None:
+                found[key] = version
+        if missing:
+            versions = self.resolver.latest_versions(missing, statuses)
+            for key in missing:
+                self.cache.set(("latest", self._project_key(), key, status_key), versions.get(key))
+            found.update(versions)
+        return found
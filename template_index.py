@@ -0,0 +1,78 @@
+"""
+Prefix-trie index of a Toolkit config's path templates.
+
+tk.templates_from_path() validates the path against every template of the
+config. A TemplateIndex is built once per config: each path template is
+filed in a trie under the static directories its definition starts with
+(root path included), so a lookup only validates the templates whose static
+prefix the path actually shares. Candidates are tried in config order, so
+match() returns the same template as tk.templates_from_path(path)[0].
+"""
+
+import os
+import re
+import instrument
+
+# A definition's static prefix ends at its first key or optional section
+_DYNAMIC = re.compile(r"[{\[]")
+
+
+def _components(path):
+    return [c for c in os.path.normcase(os.path.normpath(path)).split(os.sep) if c]
+
+
+def static_prefix(template):
+    """Return the static directory components of a path template."""
+    definition = _DYNAMIC.split(template.definition, 1)[0].replace("/", os.sep)
+    # A partial last component (e.g. "v" in "v{version}") is not static
+    head = definition.rsplit(os.sep, 1)[0] if os.sep in definition else ""
+    return _components(os.path.join(template.root_path, head))
+
+
+class _Node:
+    __slots__ = ("children", "templates")
+
+    def __init__(self):
+        self.children = {}
+        # (config order, template) filed at this prefix
+        self.templates = []
+
+
+class TemplateIndex:
+    def __init__(self, templates):
+        """templates: the config's templates in order, e.g. tk.templates.values()."""
+        self._root = _Node()
+        self.size = 0
+        for order, template in enumerate(templates):
+            if not getattr(template, "root_path", None):
+                continue  # string templates never match paths
+            node = self._root
+            for part in static_prefix(template):
+                node = node.children.setdefault(part, _Node())
+            node.templates.append((order, template))
+            self.size += 1
+
+    @classmethod
+    def from_tk(cls, tk):
+        return cls(tk.templates.values())
+
+    def candidates(self, path):
+        """Templates whose static prefix path shares, in config order."""
+        found = list(self._root.templates)
+        node = self._root
+        for part in _components(path):
+            node = node.children.get(part)
+            if node is None:
+                break
+            found.extend(node.templates)
+        found.sort(key=lambda item: item[0])
+        return [template for _, template in found]
+
+    def match(self, path):
+        """Return the first template (config order) that validates path, or None."""
+        candidates = self.candidates(path)
+        instrument.count("template_candidates", len(candidates))
+        for template in candidates:
+            if template.validate(path):
+                return template
+        return None
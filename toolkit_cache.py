@@ -0,0 +1,138 @@
+"""
+LRU caches for Toolkit instances and template resolution.
+
+Paths in the same scene almost always share a pipeline configuration and a
+handful of templates, so instead of calling sgtk.sgtk_from_path() and
+tk.templates_from_path() for every parm we keep:
+- pipeline root → Toolkit instance (matched on the project storage roots)
+- pipeline root → TemplateIndex, so an uncached path is only validated
+  against the templates sharing its static prefix
+- path → (template, fields)
+
+Call invalidate() when the pipeline configuration changes, or
+invalidate_if_config_changed() once per run to pick up edits to templates.yml.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+import instrument
+from instrument import log
+from template_index import TemplateIndex
+
+
+class ToolkitCache:
+    def __init__(self, max_instances=8, max_paths=4096):
+        self.max_instances = max_instances
+        self.max_paths = max_paths
+        self._lock = threading.RLock()
+        # pipeline root → (tk, storage roots, templates.yml mtime)
+        self._instances = OrderedDict()
+        # path → (pipeline root, template, fields)
+        self._templates = OrderedDict()
+        # pipeline root → TemplateIndex, built on first use
+        self._indexes = {}
+
+    @staticmethod
+    def _pipeline_root(tk):
+        return tk.pipeline_configuration.get_path()
+
+    @staticmethod
+    def _config_mtime(tk):
+        """Return the mtime of the config's templates.yml, or None."""
+        try:
+            config = tk.pipeline_configuration.get_config_location()
+            return os.path.getmtime(os.path.join(config, "core", "templates.yml"))
+        except Exception:
+            return None
+
+    def sgtk_from_path(self, path):
+        """Return the cached Toolkit instance whose storage roots contain path."""
+        import sgtk
+        norm = os.path.normpath(path)
+        with self._lock:
+            for root, (tk, storage_roots, _) in self._instances.items():
+                if any(norm == r or norm.startswith(r + os.sep) for r in storage_roots):
+                    self._instances.move_to_end(root)
+                    return tk
+        instrument.count("tk_cache_misses")
+        tk = sgtk.sgtk_from_path(path)
+        storage_roots = [os.path.normpath(r) for r in tk.roots.values() if r]
+        with self._lock:
+            self._instances[self._pipeline_root(tk)] = (tk, storage_roots, self._config_mtime(tk))
+            while len(self._instances) > self.max_instances:
+                self._instances.popitem(last=False)
+        return tk
+
+    def template_index(self, tk):
+        """Return the TemplateIndex of tk's config, building it once."""
+        root = self._pipeline_root(tk)
+        with self._lock:
+            index = self._indexes.get(root)
+            if index is None:
+                index = self._indexes[root] = TemplateIndex.from_tk(tk)
+                log.debug(f"[cache] Indexed {index.size} path templates for {root}")
+        return index
+
+    def template_from_path(self, path):
+        """
+        Return (tk, template, fields) for path; template is None if no template
+        matches. fields is a fresh copy the caller may modify.
+        """
+        tk = self.sgtk_from_path(path)
+        with self._lock:
+            hit = self._templates.get(path)
+            if hit:
+                self._templates.move_to_end(path)
+                instrument.count("template_cache_hits")
+                return tk, hit[1], dict(hit[2])
+        instrument.count("template_cache_misses")
+        template = self.template_index(tk).match(path)
+        if not template:
+            return tk, None, {}
+        fields = template.get_fields(path)
+        with self._lock:
+            self._templates[path] = (self._pipeline_root(tk), template, fields)
+            while len(self._templates) > self.max_paths:
+                self._templates.popitem(last=False)
+        return tk, template, dict(fields)
+
+    def invalidate(self, pipeline_root=None):
+        """Drop cached entries for one pipeline root, or everything if None."""
+        with self._lock:
+            if pipeline_root is None:
+                self._instances.clear()
+                self._templates.clear()
+                self._indexes.clear()
+                return
+            self._instances.pop(pipeline_root, None)
+            self._indexes.pop(pipeline_root, None)
+            for path in [p for p, v in self._templates.items() if v[0] == pipeline_root]:
+                del self._templates[path]
+
+    def invalidate_if_config_changed(self):
+        """Invalidate every pipeline root whose templates.yml changed on disk."""
+        with self._lock:
+            stale = [
+                root for root, (tk, _, mtime) in self._instances.items()
+                if self._config_mtime(tk) != mtime
+            ]
+        for root in stale:
+            log.info(f"[cache] Pipeline config changed, invalidating: {root}")
+            self.invalidate(root)
+        return stale
+
+
+_cache = ToolkitCache()
+
+def sgtk_from_path(path):
+    return _cache.sgtk_from_path(path)
+
+def template_from_path(path):
+    return _cache.template_from_path(path)
+
+def invalidate(pipeline_root=None):
+    _cache.invalidate(pipeline_root)
+
+def invalidate_if_config_changed():
+    return _cache.invalidate_if_config_changed()
@@ -0,0 +1,252 @@
+"""
+Qt dialog and background worker of the update tool. Imported on demand by
+gui.update_paths_gui(), so only sessions that open the dialog load Qt.
+"""
+
+import time
+import hou
+from PySide2 import QtWidgets, QtCore
+import core  # make sure core.py is on Python path
+import instrument
+
+# Unique paths resolved per batched call; results stream in at this granularity
+STREAM_CHUNK = 25
+
+
+class ResolveWorker(QtCore.QObject):
+    """
+    Resolves paths off the main thread in batched chunks, emitting results as
+    they arrive, on a ShotGrid connection borrowed from the session pool.
+    Never touches the scene; parms are set by the dialog.
+    """
+    resolved = QtCore.Signal(str, object)   # original path, resolved path or None
+    progress = QtCore.Signal(int, int)      # done, total
+    finished = QtCore.Signal(bool)          # True if cancelled
+    failed = QtCore.Signal(str)
+
+    def __init__(self, paths, version_filter):
+        super(ResolveWorker, self).__init__()
+        self.paths = list(dict.fromkeys(paths))
+        self.version_filter = version_filter
+        self._cancelled = False
+        # Created here, on the main thread, before run() moves to the worker
+        self.query = core.get_query()
+        self.pool = None if self.query.offline else core.get_connection_pool()
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            if self.pool is None:
+                self._resolve_chunks()
+            else:
+                with self.pool.connection() as sg, self.query.use_connection(sg):
+                    self._resolve_chunks()
+        except Exception as e:
+            self.failed.emit(str(e))
+        self.finished.emit(self._cancelled)
+
+    def _resolve_chunks(self):
+        done = 0
+        for i in range(0, len(self.paths), STREAM_CHUNK):
+            if self._cancelled:
+                break
+            chunk = self.paths[i:i + STREAM_CHUNK]
+            results = core.resolve_paths(chunk, None, self.version_filter, mode="batched")
+            for path in chunk:
+                self.resolved.emit(path, results.get(path))
+            done += len(chunk)
+            self.progress.emit(done, len(self.paths))
+
+
+class UpdatePathsDialog(QtWidgets.QDialog):
+    """
+    Dialog to configure and run the update paths operation.
+    Resolution runs in a background thread and streams into the results
+    table; parms are only set on the main thread when Apply is pressed.
+    """
+    COLUMNS = ["Parm", "Current", "Resolved"]
+
+    def __init__(self, parent=None):
+        super(UpdatePathsDialog, self).__init__(parent)
+        self.setWindowTitle("Update File & Alembic Paths")
+        self.resize(900, 500)
+        self._thread = None
+        self._worker = None
+        self._rows = {}         # original path → [row, ...]
+        self._snapshots = []
+        self._started = 0.0
+
+        # Scope selection
+        scope_label = QtWidgets.QLabel("Apply to:")
+        self.selected_radio = QtWidgets.QRadioButton("Selected Nodes")
+        self.all_radio = QtWidgets.QRadioButton("All Nodes")
+        self.all_radio.setChecked(True)
+        scope_layout = QtWidgets.QHBoxLayout()
+        scope_layout.addWidget(scope_label)
+        scope_layout.addWidget(self.selected_radio)
+        scope_layout.addWidget(self.all_radio)
+
+        # Publish filter
+        self.filter_combo = QtWidgets.QComboBox()
+        self.filter_combo.addItems(["apr_ta", "apr", "ta", "all"])
+        self.filter_combo.setCurrentText("apr_ta")
+        filter_layout = QtWidgets.QHBoxLayout()
+        filter_layout.addWidget(QtWidgets.QLabel("Version filter:"))
+        filter_layout.addWidget(self.filter_combo)
+
+        # Cached publishes are reused within the session unless refreshed
+        self.refresh_check = QtWidgets.QCheckBox("Refresh ShotGrid cache")
+
+        # Results: one row per parm, checked rows get applied
+        self.table = QtWidgets.QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+
+        # Progress
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.eta_label = QtWidgets.QLabel("")
+        progress_layout = QtWidgets.QHBoxLayout()
+        progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.eta_label)
+
+        # Buttons
+        self.run_button = QtWidgets.QPushButton("Run")
+        self.apply_button = QtWidgets.QPushButton("Apply")
+        self.apply_button.setEnabled(False)
+        self.cancel_button = QtWidgets.QPushButton("Cancel")
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(self.run_button)
+        button_layout.addWidget(self.apply_button)
+        button_layout.addWidget(self.cancel_button)
+
+        # Main layout
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.addLayout(scope_layout)
+        main_layout.addLayout(filter_layout)
+        main_layout.addWidget(self.refresh_check)
+        main_layout.addWidget(self.table)
+        main_layout.addLayout(progress_layout)
+        main_layout.addLayout(button_layout)
+
+        # Signals
+        self.run_button.clicked.connect(self.start)
+        self.apply_button.clicked.connect(self.apply)
+        self.cancel_button.clicked.connect(self.cancel)
+
+    def get_options(self):
+        return {
+            "scope": "selected" if self.selected_radio.isChecked() else "all",
+            "version_filter": self.filter_combo.currentText(),
+            "refresh": self.refresh_check.isChecked()
+        }
+
+    def _running(self):
+        return self._thread is not None and self._thread.isRunning()
+
+    def start(self):
+        """Snapshot the parms on the main thread, then resolve in the background."""
+        opts = self.get_options()
+        if opts["refresh"]:
+            core.refresh_publish_cache()
+        core.begin_run()
+        nodes = None if opts["scope"] == "all" else hou.selectedNodes()
+        self._snapshots = core.collect_path_parms(nodes)
+        self._rows = {}
+        self.table.setRowCount(len(self._snapshots))
+        for row, snap in enumerate(self._snapshots):
+            item = QtWidgets.QTableWidgetItem(snap.parm.path())
+            item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.Unchecked)
+            self.table.setItem(row, 0, item)
+            self.table.setItem(row, 1, QtWidgets.QTableWidgetItem(snap.value))
+            self.table.setItem(row, 2, QtWidgets.QTableWidgetItem("…"))
+            self._rows.setdefault(snap.value, []).append(row)
+
+        self.progress_bar.setRange(0, max(1, len(self._rows)))
+        self.progress_bar.setValue(0)
+        self.eta_label.setText("")
+        self.run_button.setEnabled(False)
+        self.apply_button.setEnabled(False)
+        self.cancel_button.setText("Cancel")
+        self._started = time.time()
+
+        self._thread = QtCore.QThread(self)
+        self._worker = ResolveWorker(list(self._rows), opts["version_filter"])
+        self._worker.moveToThread(self._thread)
+        self._thread.started.connect(self._worker.run)
+        self._worker.resolved.connect(self._on_resolved)
+        self._worker.progress.connect(self._on_progress)
+        self._worker.failed.connect(self._on_failed)
+        self._worker.finished.connect(self._on_finished)
+        self._worker.finished.connect(self._thread.quit)
+        self._thread.start()
+
+    def _on_resolved(self, path, newp):
+        for row in self._rows.get(path, []):
+            item = self.table.item(row, 2)
+            if not newp:
+                item.setText("unresolved")
+            elif newp == path:
+                item.setText("up to date")
+            else:
+                item.setText(newp)
+                self.table.item(row, 0).setCheckState(QtCore.Qt.Checked)
+            item.setData(QtCore.Qt.UserRole, newp)
+
+    def _on_progress(self, done, total):
+        self.progress_bar.setValue(done)
+        elapsed = time.time() - self._started
+        eta = elapsed / done * (total - done) if done else 0
+        self.eta_label.setText(f"{done}/{total} — ETA {eta:.0f}s")
+
+    def _on_failed(self, message):
+        hou.ui.setStatusMessage(f"Error resolving paths: {message}", severity=hou.severityType.Error)
+
+    def _on_finished(self, cancelled):
+        self.run_button.setEnabled(True)
+        self.apply_button.setEnabled(any(self._changes()))
+        self.cancel_button.setText("Close")
+        self.cancel_button.setEnabled(True)
+        state = "cancelled" if cancelled else "done"
+        self.eta_label.setText(f"{state} in {time.time() - self._started:.1f}s")
+
+    def _changes(self):
+        """ParmChange for every checked row whose path resolved to something new."""
+        changes = []
+        for row, snap in enumerate(self._snapshots):
+            newp = self.table.item(row, 2).data(QtCore.Qt.UserRole)
+            checked = self.table.item(row, 0).checkState() == QtCore.Qt.Checked
+            if checked and newp and newp != snap.value:
+                changes.append(core.ParmChange(snap.node, snap.parm, snap.value, newp))
+        return changes
+
+    def apply(self):
+        """Set the confirmed changes on the main thread, as one undo step."""
+        changes = core.reject_missing_targets(self._changes())
+        try:
+            core.apply_node_updates(changes)
+            instrument.stats().log_summary()
+            hou.ui.setStatusMessage(f"Paths updated successfully ({len(changes)} changed).", severity=hou.severityType.ImportantMessage)
+            self.accept()
+        except Exception as e:
+            hou.ui.setStatusMessage(f"Error updating paths: {e}", severity=hou.severityType.Error)
+
+    def cancel(self):
+        if self._running():
+            self._worker.cancel()
+            self.cancel_button.setEnabled(False)
+            return
+        hou.ui.setStatusMessage("Update cancelled.", severity=hou.severityType.Message)
+        self.reject()
+
+    def reject(self):
+        # Closing mid-run: let the worker stop after its current chunk
+        if self._running():
+            self._worker.cancel()
+            self._thread.quit()
+            self._thread.wait()
+        super(UpdatePathsDialog, self).reject()